@@ -1,17 +1,33 @@
+import io
 import os
 from pathlib import Path
 
-from dotenv import load_dotenv
-
 
 # Load environment variables from .env (project root or server path)
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(os.getenv("WEB_DOTENV_PATH", BASE_DIR.parent / ".env"))
-
-
-SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "dev-secret-key-change-in-prod")
-
-DEBUG = os.getenv("DJANGO_DEBUG", "False") == "True"
+# .env парсим один раз на процесс-родитель: дочерние процессы (autoreload,
+# воркеры) наследуют уже заполненное окружение. В проде переменные задаёт
+# systemd/docker — там можно выставить DJANGO_SKIP_DOTENV=1 и не читать файл вовсе.
+if os.getenv("DJANGO_SKIP_DOTENV") != "1" and os.getenv("DJANGO_DOTENV_LOADED") != "1":
+    # Файл читаем целиком за один вызов и отдаём парсеру dotenv уже из памяти.
+    try:
+        _dotenv_text = Path(os.getenv("WEB_DOTENV_PATH", BASE_DIR.parent / ".env")).read_text(encoding="utf-8")
+    except OSError:
+        _dotenv_text = ""
+    if _dotenv_text:
+        # dotenv импортируем только когда файл реально есть (в проде его обычно нет)
+        from dotenv import load_dotenv
+
+        load_dotenv(stream=io.StringIO(_dotenv_text), override=False)
+    os.environ["DJANGO_DOTENV_LOADED"] = "1"
+
+# Снимок окружения: читаем один раз после загрузки .env, дальше — обычный dict.get
+_env = os.environ.copy()
+_getenv = _env.get
+
+SECRET_KEY = _getenv("DJANGO_SECRET_KEY", "dev-secret-key-change-in-prod")
+
+DEBUG = _getenv("DJANGO_DEBUG", "False") == "True"
 
 import sys
 _is_management_command = len(sys.argv) > 1 and sys.argv[1] in ("migrate", "collectstatic", "check", "makemigrations", "showmigrations")
@@ -20,19 +36,18 @@ if not DEBUG and not _is_management_command and SECRET_KEY == "dev-secret-key-ch
         "DJANGO_SECRET_KEY не задан! Укажите надёжный секретный ключ через переменную окружения."
     )
 
-ALLOWED_HOSTS: list[str] = [h.strip() for h in os.getenv("DJANGO_ALLOWED_HOSTS", "localhost,127.0.0.1").split(",") if h.strip()]
+ALLOWED_HOSTS: list[str] = [h.strip() for h in _getenv("DJANGO_ALLOWED_HOSTS", "localhost,127.0.0.1").split(",") if h.strip()]
 
 # Истоки, с которых разрешены POST-запросы (HTTPS за прокси). Иначе при регистрации/логине — 403 CSRF.
-_origins = []
-for _h in ALLOWED_HOSTS:
-    if _h in ("localhost", "127.0.0.1"):
-        _origins.append(f"http://{_h}")
-    else:
-        _origins.extend((f"https://{_h}", f"http://{_h}"))
-CSRF_TRUSTED_ORIGINS = _origins
+_LOCAL_HOSTS = frozenset(("localhost", "127.0.0.1"))
+CSRF_TRUSTED_ORIGINS = [
+    _origin
+    for _h in ALLOWED_HOSTS
+    for _origin in ((f"http://{_h}",) if _h in _LOCAL_HOSTS else (f"https://{_h}", f"http://{_h}"))
+]
 
 # Основной домен сайта (для реферальных ссылок и т.д.)
-SITE_URL = os.getenv("SITE_URL", "https://rupartnerka.ru")
+SITE_URL = _getenv("SITE_URL", "https://rupartnerka.ru")
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -65,8 +80,25 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # В проде шаблоны компилируются один раз на процесс (cached.Loader);
+            # в DEBUG читаем с диска, чтобы правки подхватывались без рестарта.
+            "loaders": (
+                [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]
+                if DEBUG
+                else [
+                    (
+                        "django.template.loaders.cached.Loader",
+                        [
+                            "django.template.loaders.filesystem.Loader",
+                            "django.template.loaders.app_directories.Loader",
+                        ],
+                    ),
+                ]
+            ),
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -83,23 +115,57 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "base_site.wsgi.application"
 
+# Кэш: при заданном REDIS_URL — общий Redis на все воркеры (нужен пакет redis),
+# иначе — локальная память процесса.
+_redis_url = _getenv("REDIS_URL", "").strip()
+if _redis_url:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": _redis_url,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+    }
+
+# Сессии читаются из кэша, в БД — только запись/промах кэша. Только при общем Redis:
+# LocMemCache у каждого воркера свой, и выход/смена отдела в одном воркере
+# не видны другому до истечения записи — там остаётся обычный db-бэкенд.
+if _redis_url:
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
 
 # Database: PostgreSQL (настраивается через переменные окружения)
-_db_host = os.getenv("DB_HOST", "127.0.0.1")
+_db_host = _getenv("DB_HOST", "127.0.0.1")
+# Повторное использование соединения (секунды). Сильно ускоряет при удалённой БД.
+_db_conn_max_age = int(_getenv("DB_CONN_MAX_AGE", "300"))
+# DB_PGBOUNCER=1 — HOST указывает на pgbouncer в transaction-режиме: там нельзя
+# держать серверные курсоры между транзакциями.
+_db_pgbouncer = _getenv("DB_PGBOUNCER", "") == "1"
+# Ограничение времени запроса (мс) на стороне PostgreSQL: зависший запрос не держит воркер.
+_db_statement_timeout = _getenv("DB_STATEMENT_TIMEOUT_MS", "").strip()
+_db_options: dict = {}
+if _db_statement_timeout:
+    _db_options["options"] = f"-c statement_timeout={int(_db_statement_timeout)}"
 DATABASE_ROUTERS = ["base_site.db_router.WindowgramRouter"]
 
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("DB_NAME", "basebot"),
-        "USER": os.getenv("DB_USER", "basebot_user"),
-        "PASSWORD": os.getenv("DB_PASSWORD", ""),
+        "NAME": _getenv("DB_NAME", "basebot"),
+        "USER": _getenv("DB_USER", "basebot_user"),
+        "PASSWORD": _getenv("DB_PASSWORD", ""),
         "HOST": _db_host,
-        "PORT": os.getenv("DB_PORT", "5432"),
-        # Повторное использование соединения (секунды). Сильно ускоряет при удалённой БД.
-        "CONN_MAX_AGE": 300,
+        "PORT": _getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": _db_conn_max_age,
         # Проверять живое ли соединение перед использованием — при долгом простое иначе 500.
         "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": _db_pgbouncer,
+        "OPTIONS": dict(_db_options),
     },
     # Read-only подключение к базе бота (windowgram) — нужно для авто-матчинга
     # SearchLink'ов с реальными conversations в боте. Используется только в
@@ -107,19 +173,32 @@ DATABASES = {
     # NB: Django никогда не создаёт миграции в этой БД (она не наша).
     "windowgram": {
         "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("WG_DB_NAME", "windowgram"),
-        "USER": os.getenv("WG_DB_USER", os.getenv("DB_USER", "")),
-        "PASSWORD": os.getenv("WG_DB_PASSWORD", os.getenv("DB_PASSWORD", "")),
-        "HOST": os.getenv("WG_DB_HOST", _db_host),
-        "PORT": os.getenv("WG_DB_PORT", os.getenv("DB_PORT", "5432")),
-        "CONN_MAX_AGE": 300,
+        "NAME": _getenv("WG_DB_NAME", "windowgram"),
+        "USER": _getenv("WG_DB_USER", _getenv("DB_USER", "")),
+        "PASSWORD": _getenv("WG_DB_PASSWORD", _getenv("DB_PASSWORD", "")),
+        "HOST": _getenv("WG_DB_HOST", _db_host),
+        "PORT": _getenv("WG_DB_PORT", _getenv("DB_PORT", "5432")),
+        "CONN_MAX_AGE": _db_conn_max_age,
         "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": _db_pgbouncer,
+        "OPTIONS": dict(_db_options),
     },
 }
-# SSL для подключения к БД по публичному хосту (например Timeweb *.twc1.net)
-if ".twc1.net" in _db_host or _db_host not in ("127.0.0.1", "localhost"):
-    DATABASES["default"]["OPTIONS"] = {"sslmode": "require"}
-    DATABASES["windowgram"]["OPTIONS"] = {"sslmode": "require"}
+# SSL для подключения к БД по публичному хосту (например Timeweb *.twc1.net).
+# Плюс быстрый таймаут соединения и TCP keepalive — обрыв до удалённой БД
+# обнаруживается за секунды, а не после долгого зависания воркера.
+if _db_host not in _LOCAL_HOSTS:
+    _db_remote_options = {
+        "sslmode": "require",
+        "connect_timeout": 3,
+        "keepalives": 1,
+        "keepalives_idle": 30,
+    }
+    _db_sslrootcert = _getenv("DB_SSLROOTCERT", "").strip()
+    if _db_sslrootcert:
+        _db_remote_options["sslrootcert"] = _db_sslrootcert
+    DATABASES["default"]["OPTIONS"].update(_db_remote_options)
+    DATABASES["windowgram"]["OPTIONS"].update(_db_remote_options)
 
 
 AUTH_PASSWORD_VALIDATORS: list[dict] = []
@@ -137,23 +216,40 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# Статика — всегда WhiteNoise: collectstatic заранее сжимает файлы (.gz/.br) и
+# добавляет хэш в имя. Все ссылки в шаблонах идут через {% static %}, т.е. на
+# хэшированные имена, поэтому их можно кэшировать в браузере на год.
+_STATICFILES_STORAGE = {
+    "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+}
+WHITENOISE_MAX_AGE = 31536000
+WHITENOISE_USE_FINDERS = False
+
 # Медиафайлы: при наличии бакета и ключей в окружении — только S3 (Timeweb). Иначе — из админки. Локально не сохраняем.
-_s3_bucket = os.getenv("AWS_STORAGE_BUCKET_NAME", "").strip()
-_s3_access = os.getenv("AWS_ACCESS_KEY_ID", "").strip()
-_s3_secret = os.getenv("AWS_SECRET_ACCESS_KEY", "").strip()
-_s3_region = os.getenv("AWS_S3_REGION_NAME", "ru-1").strip() or "ru-1"
-_s3_endpoint = os.getenv("AWS_S3_ENDPOINT_URL", "").strip().rstrip("/")
+_s3_bucket = _getenv("AWS_STORAGE_BUCKET_NAME", "").strip()
+_s3_access = _getenv("AWS_ACCESS_KEY_ID", "").strip()
+_s3_secret = _getenv("AWS_SECRET_ACCESS_KEY", "").strip()
+_s3_region = _getenv("AWS_S3_REGION_NAME", "ru-1").strip() or "ru-1"
+_s3_endpoint = _getenv("AWS_S3_ENDPOINT_URL", "").strip().rstrip("/")
 
 USE_S3_MEDIA_ENV = (
-    os.getenv("USE_S3_MEDIA", "").strip().lower() in ("1", "true", "yes")
+    _getenv("USE_S3_MEDIA", "").strip().lower() in ("1", "true", "yes")
     or bool(_s3_bucket and _s3_access and _s3_secret)
 )
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Медиа из админки (ConfigurableMediaStorage) — по умолчанию. Статика — всегда WhiteNoise.
+STORAGES = {
+    "default": {
+        "BACKEND": "core.storage.ConfigurableMediaStorage",
+    },
+    "staticfiles": _STATICFILES_STORAGE,
+}
+
 if USE_S3_MEDIA_ENV and _s3_bucket and _s3_access and _s3_secret:
-    # S3 напрямую из переменных окружения (Timeweb Cloud и др.): STORAGES + явные OPTIONS.
+    # S3 напрямую из переменных окружения (Timeweb Cloud и др.): явные OPTIONS.
     # Timeweb: подпись AWS Signature V4, path-style URL (https://s3.twcstorage.ru/bucket/key).
     # Все медиа — в бакете под префиксом media/ (media/leads/user_5/..., media/support/...).
     _s3_options = {
@@ -170,16 +266,11 @@ if USE_S3_MEDIA_ENV and _s3_bucket and _s3_access and _s3_secret:
     }
     if _s3_endpoint:
         _s3_options["endpoint_url"] = _s3_endpoint
-    STORAGES = {
-        "default": {
-            "BACKEND": "storages.backends.s3.S3Storage",
-            "OPTIONS": _s3_options,
-        },
-        "staticfiles": {
-            "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
-        },
+    STORAGES["default"] = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": _s3_options,
     }
-    DEFAULT_FILE_STORAGE = "storages.backends.s3.S3Storage"
+    # AWS_* читают диагностика хранилища и core.apps (лог при старте).
     AWS_ACCESS_KEY_ID = _s3_access
     AWS_SECRET_ACCESS_KEY = _s3_secret
     AWS_STORAGE_BUCKET_NAME = _s3_bucket
@@ -187,17 +278,6 @@ if USE_S3_MEDIA_ENV and _s3_bucket and _s3_access and _s3_secret:
     if _s3_endpoint:
         AWS_S3_ENDPOINT_URL = _s3_endpoint
         AWS_S3_SIGNATURE_VERSION = "s3v4"
-else:
-    # Медиа из админки (ConfigurableMediaStorage). Статика — WhiteNoise.
-    STORAGES = {
-        "default": {
-            "BACKEND": "core.storage.ConfigurableMediaStorage",
-        },
-        "staticfiles": {
-            "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
-        },
-    }
-    DEFAULT_FILE_STORAGE = "core.storage.ConfigurableMediaStorage"
 
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -208,18 +288,18 @@ LOGIN_REDIRECT_URL = "dashboard"
 LOGOUT_REDIRECT_URL = "index"
 
 # Минимальный баланс для кнопки «Запрос на вывод» (руб.)
-WITHDRAWAL_MIN_BALANCE = int(os.getenv("WITHDRAWAL_MIN_BALANCE", "500"))
+WITHDRAWAL_MIN_BALANCE = int(_getenv("WITHDRAWAL_MIN_BALANCE", "500"))
 
 # Отдел дожима
-DOZHIM_APPROVE_REWARD = int(os.getenv("DOZHIM_APPROVE_REWARD", "40"))
-DOZHIM_BATCH_SIZE = int(os.getenv("DOZHIM_BATCH_SIZE", "10"))
+DOZHIM_APPROVE_REWARD = int(_getenv("DOZHIM_APPROVE_REWARD", "40"))
+DOZHIM_BATCH_SIZE = int(_getenv("DOZHIM_BATCH_SIZE", "10"))
 # Фиче-флаг: отдел дожима скрыт на проде (2026-07). Код целиком сохранён —
 # чтобы вернуть отдел, выставить переменную окружения DOZHIM_ENABLED=true.
 # Скрывает переключатель отдела, все дожим-вьюхи (юзер/партнёр) и админ-вкладку.
-DOZHIM_ENABLED = os.getenv("DOZHIM_ENABLED", "false").lower() == "true"
+DOZHIM_ENABLED = _getenv("DOZHIM_ENABLED", "false").lower() == "true"
 
 # SearchLink система
-SEARCH_BOT_WEBHOOK_SECRET = os.getenv("SEARCH_BOT_WEBHOOK_SECRET", "")
+SEARCH_BOT_WEBHOOK_SECRET = _getenv("SEARCH_BOT_WEBHOOK_SECRET", "")
 SEARCH_REPORT_REWARD = 150
 # Phone-callback вариант SearchLink (клиент оставил номер, робот прозванивает)
 SEARCH_PHONE_REPORT_REWARD = 65
@@ -230,8 +310,8 @@ SEARCH_PHONE_REPORT_REWARD = 65
 #    и оплата. Пока выключено: менеджеры создают ссылки и видят проверку бота +
 #    старую статистику, но не «кидают отчёты» / не добавляют клиентов в работу.
 #    У админов раздел проверки отчётов остаётся в «Легаси», пока reports off.
-SEARCHLINK_ENABLED = os.getenv("SEARCHLINK_ENABLED", "true").lower() == "true"
-SEARCHLINK_REPORTS_ENABLED = os.getenv("SEARCHLINK_REPORTS_ENABLED", "false").lower() == "true"
+SEARCHLINK_ENABLED = _getenv("SEARCHLINK_ENABLED", "true").lower() == "true"
+SEARCHLINK_REPORTS_ENABLED = _getenv("SEARCHLINK_REPORTS_ENABLED", "false").lower() == "true"
 
 # ── Новая воронка SearchLink (windowgram-driven, 2026-07) ──
 # Начисления менеджеру по статусу клиента в CRM windowgram:
@@ -240,42 +320,64 @@ SEARCHLINK_REPORTS_ENABLED = os.getenv("SEARCHLINK_REPORTS_ENABLED", "false").lo
 # Реф-сплит (если у менеджера есть partner_owner): рефовод получает REFERRER-долю,
 # менеджер — остаток. Если рефовода НЕТ — менеджер берёт всё, а Варвара (varvara_lead,
 # balance_admin) снимает фикс-фи сверху.
-SEARCH_SOZVON_REWARD = int(os.getenv("SEARCH_SOZVON_REWARD", "150"))       # всего за созвон
-SEARCH_SOZVON_REFERRER = int(os.getenv("SEARCH_SOZVON_REFERRER", "50"))    # рефоводу с созвона (менеджер: 150-50=100)
-SEARCH_DEAL_REWARD = int(os.getenv("SEARCH_DEAL_REWARD", "4000"))          # всего за сделку
-SEARCH_DEAL_REFERRER = int(os.getenv("SEARCH_DEAL_REFERRER", "1000"))      # рефоводу со сделки (менеджер: 4000-1000=3000)
-SEARCH_VARVARA_SOZVON_FEE = int(os.getenv("SEARCH_VARVARA_SOZVON_FEE", "10"))    # Варваре за СОЗВОН (со ВСЕХ клиентов). 2026-07-22: правило вернули с чата обратно на созвон.
-SEARCH_VARVARA_DEAL_FEE = int(os.getenv("SEARCH_VARVARA_DEAL_FEE", "100"))       # Варваре со сделки (со ВСЕХ клиентов)
-VARVARA_USER_ID = int(os.getenv("VARVARA_USER_ID", "123"))                 # varvara_lead (balance_admin, получатель фи)
+SEARCH_SOZVON_REWARD = int(_getenv("SEARCH_SOZVON_REWARD", "150"))       # всего за созвон
+SEARCH_SOZVON_REFERRER = int(_getenv("SEARCH_SOZVON_REFERRER", "50"))    # рефоводу с созвона (менеджер: 150-50=100)
+SEARCH_DEAL_REWARD = int(_getenv("SEARCH_DEAL_REWARD", "4000"))          # всего за сделку
+SEARCH_DEAL_REFERRER = int(_getenv("SEARCH_DEAL_REFERRER", "1000"))      # рефоводу со сделки (менеджер: 4000-1000=3000)
+SEARCH_VARVARA_SOZVON_FEE = int(_getenv("SEARCH_VARVARA_SOZVON_FEE", "10"))    # Варваре за СОЗВОН (со ВСЕХ клиентов). 2026-07-22: правило вернули с чата обратно на созвон.
+SEARCH_VARVARA_DEAL_FEE = int(_getenv("SEARCH_VARVARA_DEAL_FEE", "100"))       # Варваре со сделки (со ВСЕХ клиентов)
+VARVARA_USER_ID = int(_getenv("VARVARA_USER_ID", "123"))                 # varvara_lead (balance_admin, получатель фи)
 
 # Фиче-флаг: старая система начислений (подача Lead/GroupReport-отчётов и их
 # % -начисления). По умолчанию ВЫКЛ (2026-07): начисляем только через новую
 # воронку windowgram. Данные и связи partner_owner СОХРАНЕНЫ (ничего не дропаем)
 # — вернуть = LEGACY_REWARDS_ENABLED=true.
-LEGACY_REWARDS_ENABLED = os.getenv("LEGACY_REWARDS_ENABLED", "false").lower() == "true"
+LEGACY_REWARDS_ENABLED = _getenv("LEGACY_REWARDS_ENABLED", "false").lower() == "true"
 
 # Фиче-флаг: кабинет рефералов (список рефов + заработок по новой воронке +
 # редактирование реф-ставок). ВКЛючён по умолчанию — это ТЕКУЩАЯ реф-система
 # (per-рефовод доли с созвона/сделки реферала), независимая от старых отчётов.
-REFERRAL_SYSTEM_ENABLED = os.getenv("REFERRAL_SYSTEM_ENABLED", "true").lower() == "true"
+REFERRAL_SYSTEM_ENABLED = _getenv("REFERRAL_SYSTEM_ENABLED", "true").lower() == "true"
 
 # Фиче-флаг: создание чатов менеджерами через windowgram (кабинет «Прозвоны»/
 # холодные контакты). ВЫКЛючен по решению владельца 2026-07-28 — временно, до
 # отдельного распоряжения. Персональные права (`can_create_group_reports`) и
 # привязки подадминов НЕ трогаем: включение обратно = этот флаг в true, доступ
 # у всех 61 менеджера восстановится мгновенно, ничего не выдавая заново.
-COLD_CHAT_CREATION_ENABLED = os.getenv("COLD_CHAT_CREATION_ENABLED", "false").lower() == "true"
+COLD_CHAT_CREATION_ENABLED = _getenv("COLD_CHAT_CREATION_ENABLED", "false").lower() == "true"
 
 # Фиче-флаг: система чеков по выплатам (загрузка чеков пользователем + гейт
 # «загрузите чек по предыдущей выплате перед новым выводом» + модерация чеков).
 # По умолчанию ВЫКЛ (2026-07, временно): чеки скрыты, вывод не блокируется их
 # отсутствием. Данные receipt_* сохранены. Вернуть = WITHDRAWAL_RECEIPTS_ENABLED=true.
-WITHDRAWAL_RECEIPTS_ENABLED = os.getenv("WITHDRAWAL_RECEIPTS_ENABLED", "false").lower() == "true"
+WITHDRAWAL_RECEIPTS_ENABLED = _getenv("WITHDRAWAL_RECEIPTS_ENABLED", "false").lower() == "true"
 
 # Лимит загрузки файлов: вложения лидов (скрин/видео) до 30 МБ
 _DATA_UPLOAD_MAX = 33 * 1024 * 1024  # 33 МБ, чтобы 30 МБ файл проходил
 DATA_UPLOAD_MAX_MEMORY_SIZE = _DATA_UPLOAD_MAX
-FILE_UPLOAD_MAX_MEMORY_SIZE = _DATA_UPLOAD_MAX
+# Сами файлы в память целиком не кладём: всё крупнее 256 КБ пишется чанками во
+# временный файл на диске (иначе каждый воркер держит до 30 МБ на загрузку).
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+FILE_UPLOAD_HANDLERS = [
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+# Каталог для временных файлов загрузки (например tmpfs /dev/shm/uploads); по умолчанию — системный tmp.
+FILE_UPLOAD_TEMP_DIR = _getenv("FILE_UPLOAD_TEMP_DIR", "").strip() or None
+
+# Логирование: поверх стандартного конфига Django глушим построчный лог SQL
+# (django.db.backends пишет каждый запрос при DEBUG=True) и шум autoreload.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "null": {"class": "logging.NullHandler"},
+    },
+    "loggers": {
+        "django.db.backends": {"handlers": ["null"], "level": "WARNING", "propagate": False},
+        "django.utils.autoreload": {"handlers": ["null"], "level": "WARNING", "propagate": False},
+    },
+}
 
 # Безопасность при HTTPS (продакшен за прокси)
 if not DEBUG:
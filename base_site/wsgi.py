@@ -7,3 +7,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "base_site.settings")
 
 application = get_wsgi_application()
 
+from core.storage import warm_up_env_s3_storage  # noqa: E402
+
+warm_up_env_s3_storage()
+
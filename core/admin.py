@@ -50,6 +50,21 @@ class BaseTypeAdmin(admin.ModelAdmin):
     list_editable = ("default_daily_limit", "order")
     search_fields = ("name", "slug")
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        from .lead_utils import clear_base_type_cache
+        clear_base_type_cache()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        from .lead_utils import clear_base_type_cache
+        clear_base_type_cache()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        from .lead_utils import clear_base_type_cache
+        clear_base_type_cache()
+
 
 @admin.register(models.Contact)
 class ContactAdmin(admin.ModelAdmin):
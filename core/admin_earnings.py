@@ -9,8 +9,9 @@
 Используется в:
 - core.views.user_dashboard (баланс админа)
 - core.views_support_admin.admin_earnings_stats
-- core.context_processors.admin_balance_context
+- core.context_processors.admin_balance_context (через cached_admin_balance)
 """
+import time
 from decimal import Decimal
 
 LEAD_REVIEW_RATE = Decimal("2.5")
@@ -110,3 +111,33 @@ def actions_earned_for_admins(admin_ids):
                           + gr * GROUP_REPORT_REVIEW_RATE),
         }
     return out
+
+
+# Баланс админа для навбара и опроса account_updates: admin_id -> (expires_at, balance).
+# Сама заявка на вывод считает баланс без кэша.
+_ADMIN_BALANCE_CACHE: dict = {}
+ADMIN_BALANCE_CACHE_SECONDS = 30
+
+
+def cached_admin_balance(admin) -> int:
+    """Доступный баланс админа (заработано − выводы pending/approved), кэш на 30 сек."""
+    now = time.time()
+    cached = _ADMIN_BALANCE_CACHE.get(admin.pk)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    from django.db.models import Sum
+    from .models import WithdrawalRequest
+    withdrawn = (
+        WithdrawalRequest.objects.filter(user=admin, status__in=("pending", "approved"))
+        .aggregate(s=Sum("amount"))
+        .get("s")
+        or 0
+    )
+    balance = max(0, total_earned(admin) - withdrawn)
+    _ADMIN_BALANCE_CACHE[admin.pk] = (now + ADMIN_BALANCE_CACHE_SECONDS, balance)
+    return balance
+
+
+def clear_admin_balance_cache(admin_id: int) -> None:
+    """Сбросить кэш баланса админа (после создания/отмены его заявки на вывод)."""
+    _ADMIN_BALANCE_CACHE.pop(admin_id, None)
@@ -16,8 +16,12 @@ def rework_leads(request):
             return {"rework_leads_count": 0}
         if getattr(request.user, "role", None) in ("support", "admin", "main_admin", "standalone_admin", "worker"):
             return {"rework_leads_count": 0}
-        from .models import Lead
-        count = Lead.objects.filter(user=request.user, status=Lead.Status.REWORK).count()
+        # Уже посчитан во view (дашборд) — повторный COUNT не нужен
+        count = getattr(request, "_rework_leads_count", None)
+        if count is None:
+            from .models import Lead
+            count = Lead.objects.filter(user=request.user, status=Lead.Status.REWORK).count()
+            request._rework_leads_count = count
         return {"rework_leads_count": count}
     except Exception as e:
         logger.exception("rework_leads context processor: %s", e)
@@ -32,12 +36,9 @@ def admin_balance_context(request):
             return {}
         if getattr(user, "role", None) not in ("admin", "main_admin"):
             return {}
-        from .models import WithdrawalRequest
-        from .admin_earnings import total_earned
-        from django.db.models import Sum
-        earned = total_earned(user)
-        withdrawn = WithdrawalRequest.objects.filter(user=user, status__in=("pending", "approved")).aggregate(s=Sum("amount")).get("s") or 0
-        return {"admin_balance": max(0, earned - withdrawn)}
+        from .admin_earnings import cached_admin_balance
+        # 4 COUNT/SUM на каждую страницу — из кэша на 30 сек
+        return {"admin_balance": cached_admin_balance(user)}
     except Exception as e:
         logger.exception("admin_balance_context: %s", e)
         return {}
@@ -5,6 +5,7 @@ import re
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 
+from .lead_utils import get_base_types
 from .models import BaseType, GroupReport, Lead, LeadType, User, WorkerSelfLead
 
 
@@ -16,6 +17,8 @@ from .models import BaseType, GroupReport, Lead, LeadType, User, WorkerSelfLead
 #  - без подряд идущих __
 # Это правила TG для @username (https://core.telegram.org/method/account.checkUsername).
 _TG_USERNAME_RE = re.compile(r"^(?!.*__)[a-zA-Z][a-zA-Z0-9_]{3,30}[a-zA-Z0-9]$")
+# Ссылочные префиксы перед @ником (сравниваются с вводом в нижнем регистре)
+_TG_LINK_PREFIXES = ("https://t.me/", "http://t.me/", "t.me/", "telegram.me/")
 
 
 class UserRegistrationForm(UserCreationForm):
@@ -59,8 +62,9 @@ class UserRegistrationForm(UserCreationForm):
         raw = (self.cleaned_data.get("username") or "").strip()
         # Снимаем @, t.me/, https://t.me/, пробелы — частые варианты ввода
         cleaned = raw.lstrip("@")
-        for prefix in ("https://t.me/", "http://t.me/", "t.me/", "telegram.me/"):
-            if cleaned.lower().startswith(prefix):
+        cleaned_lower = cleaned.lower()
+        for prefix in _TG_LINK_PREFIXES:
+            if cleaned_lower.startswith(prefix):
                 cleaned = cleaned[len(prefix):]
                 break
         cleaned = cleaned.strip().rstrip("/")
@@ -312,9 +316,10 @@ class BaseCategoryUploadForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Типы баз — из кэша процесса (get_base_types), без запроса на каждый показ формы
         choices = [("", "— Выберите категорию —")]
         choices.append((self.PHONE_BASES_VALUE, "Номера (WhatsApp / Max / Viber)"))
-        for bt in BaseType.objects.all().order_by("order"):
+        for bt in get_base_types():
             if bt.slug in ("whatsapp", "max", "viber"):
                 continue
             choices.append((str(bt.pk), bt.name))
@@ -325,9 +330,13 @@ class BaseCategoryUploadForm(forms.Form):
         if val == self.PHONE_BASES_VALUE:
             return val
         try:
-            return BaseType.objects.get(pk=int(val))
-        except (ValueError, BaseType.DoesNotExist):
+            pk = int(val)
+        except ValueError:
             raise forms.ValidationError("Выберите категорию.")
+        for bt in get_base_types():
+            if bt.pk == pk:
+                return bt
+        raise forms.ValidationError("Выберите категорию.")
 
 
 class LeadsExcelUploadForm(forms.Form):
@@ -8,21 +8,94 @@ import re
 import shutil
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
-from django.core.files.base import ContentFile
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.files.base import File
+from django.db import transaction
+from django.db.models import Case, Q, When
 
 logger = logging.getLogger(__name__)
 
 LEAD_VIDEO_EXTENSIONS = frozenset(("mp4", "mov", "webm", "m4v", "3gp"))
 
+# Размер куска при потоковом копировании видео (скачивание из S3 во временный файл)
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Один фоновый поток на процесс: ffmpeg не должен держать воркер Gunicorn
+_bg_executor = ThreadPoolExecutor(max_workers=1)
+
+# Регулярки и таблицы нормализации контактов — строятся один раз при импорте.
+# Мусор в номерах: пробельные символы (как \s в re, включая неразрывный пробел;
+# все они < U+3001) и - ( ) +. str.translate быстрее re.sub на каждом контакте.
+_PHONE_JUNK_TABLE = str.maketrans(
+    "", "", "-()+" + "".join(ch for ch in map(chr, range(0x3001)) if ch.isspace())
+)
+_BARE_LOGIN_RE = re.compile(r"^[a-z0-9_]{2,}$")
+
 if TYPE_CHECKING:
     from .models import User
 
 from .models import BaseType, Contact
 
+# Кэш таблицы BaseType: несколько строк, меняется только из админки. Лежит в общем
+# кэше Django (Redis при REDIS_URL), чтобы сброс после правки в админке видели все воркеры.
+BASE_TYPE_CACHE_KEY = "core:base_types"
+CACHE_SECONDS = 300
+
+
+def _base_type_cache() -> dict:
+    """{"all": [...], "by_slug": {...}} из кэша; при промахе — один запрос к БД."""
+    data = cache.get(BASE_TYPE_CACHE_KEY)
+    if data is None:
+        base_types = list(BaseType.objects.all())
+        data = {"all": base_types, "by_slug": {bt.slug: bt for bt in base_types}}
+        cache.set(BASE_TYPE_CACHE_KEY, data, CACHE_SECONDS)
+    return data
+
+
+def get_base_types() -> list[BaseType]:
+    """Все типы баз (в порядке Meta.ordering) из кэша, без запроса к БД на каждый вызов."""
+    return _base_type_cache()["all"]
+
+
+def get_base_type_by_slug(slug: str) -> BaseType | None:
+    """BaseType по slug из кэша (вместо запроса к БД на каждый лид)."""
+    return _base_type_cache()["by_slug"].get(slug)
+
+
+def clear_base_type_cache():
+    """Сбросить кэш BaseType (вызвать после изменения типов баз в админке)."""
+    cache.delete(BASE_TYPE_CACHE_KEY)
+
 
+_TELEGRAM_DOMAINS = ("t.me/", "telegram.me/", "telegram.dog/")
+# Порядок важен: проверяются по очереди, как и раньше
+_PLATFORM_DOMAINS = (
+    ("vk.com/", "vk:"),
+    ("vk.ru/", "vk:"),
+    ("instagram.com/", "ig:"),
+    ("ok.ru/", "ok:"),
+    ("avito.ru/", "avito:"),
+)
+
+
+def _path_after(c: str, domain: str) -> str:
+    """Часть строки после domain (без query и завершающего /) или "" — за один find()."""
+    idx = c.find(domain)
+    if idx == -1:
+        return ""
+    return c[idx + len(domain) :].partition("?")[0].strip().rstrip("/")
+
+
+# Чистая функция строки: повторные вызовы с тем же контактом (проверка дублей,
+# определение базы, save) берутся из кэша
+NORMALIZE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_lead_contact(contact: str) -> str:
     """Комплексная нормализация контакта для проверки дубликатов по всей базе.
 
@@ -37,49 +110,27 @@ def normalize_lead_contact(contact: str) -> str:
     if "mail.ru" in c or "youla.ru" in c:
         return c
     # Telegram: @user, t.me/user, telegram.me/user -> telegram:user
-    for prefix in ("t.me/", "telegram.me/", "telegram.dog/"):
-        if prefix in c:
-            idx = c.find(prefix)
-            rest = c[idx + len(prefix) :].split("?")[0].strip().rstrip("/")
-            if rest:
-                return "telegram:" + rest
-    if c.startswith("@"):
-        rest = c[1:].split("?")[0].strip().rstrip("/")
+    for domain in _TELEGRAM_DOMAINS:
+        rest = _path_after(c, domain)
         if rest:
             return "telegram:" + rest
-    # VK: vk.com/xxx и vk.ru/xxx -> vk:xxx
-    for domain in ("vk.com/", "vk.ru/"):
-        if domain in c:
-            idx = c.find(domain)
-            rest = c[idx + len(domain) :].split("?")[0].strip().rstrip("/")
-            if rest:
-                return "vk:" + rest
-    # Instagram
-    if "instagram.com/" in c:
-        idx = c.find("instagram.com/")
-        rest = c[idx + 14 :].split("?")[0].strip().rstrip("/")
-        if rest:
-            return "ig:" + rest
-    # OK
-    if "ok.ru/" in c:
-        idx = c.find("ok.ru/")
-        rest = c[idx + 6 :].split("?")[0].strip().rstrip("/")
+    if c.startswith("@"):
+        rest = c[1:].partition("?")[0].strip().rstrip("/")
         if rest:
-            return "ok:" + rest
-    # Avito
-    if "avito.ru/" in c:
-        idx = c.find("avito.ru/")
-        rest = c[idx + 9 :].split("?")[0].strip().rstrip("/")
+            return "telegram:" + rest
+    # VK (vk.com/xxx и vk.ru/xxx -> vk:xxx), Instagram, OK, Avito
+    for domain, platform in _PLATFORM_DOMAINS:
+        rest = _path_after(c, domain)
         if rest:
-            return "avito:" + rest
+            return platform + rest
     # Номера: только цифры, 8XXXXXXXXXX -> 7XXXXXXXXXX
-    c_digits = re.sub(r"[\s\-\(\)\+]", "", c)
+    c_digits = c.translate(_PHONE_JUNK_TABLE)
     if c_digits.isdigit():
         if c_digits.startswith("8") and len(c_digits) == 11:
             c_digits = "7" + c_digits[1:]
         return "phone:" + c_digits
     # Один «словесный» логин без ссылки (lestily, user_name) — считаем Telegram
-    if re.match(r"^[a-z0-9_]{2,}$", c):
+    if _BARE_LOGIN_RE.match(c):
         return "telegram:" + c
     return c
 
@@ -98,6 +149,16 @@ def extract_username_from_contact(normalized: str) -> str | None:
     return None
 
 
+# Префикс нормализованного контакта → шаблон ссылки (phone — отдельно, через wa.me)
+_CONTACT_URL_TEMPLATES = {
+    "telegram": "https://t.me/{}",
+    "vk": "https://vk.com/{}",
+    "ig": "https://instagram.com/{}",
+    "ok": "https://ok.ru/{}",
+    "avito": "https://avito.ru/{}",
+}
+
+
 def raw_contact_to_url(contact: str) -> str | None:
     """По значению контакта возвращает URL для перехода (Telegram, VK, WhatsApp, Instagram и т.д.) или None."""
     if not contact or not contact.strip():
@@ -105,67 +166,63 @@ def raw_contact_to_url(contact: str) -> str | None:
     normalized = normalize_lead_contact(contact)
     if not normalized:
         return None
-    if normalized.startswith("telegram:"):
-        username = normalized[9:].strip()
-        if username:
-            return f"https://t.me/{username}"
-    if normalized.startswith("vk:"):
-        path = normalized[3:].strip()
-        if path:
-            return f"https://vk.com/{path}"
-    if normalized.startswith("ig:"):
-        username = normalized[3:].strip()
-        if username:
-            return f"https://instagram.com/{username}"
-    if normalized.startswith("ok:"):
-        path = normalized[3:].strip()
-        if path:
-            return f"https://ok.ru/{path}"
-    if normalized.startswith("avito:"):
-        path = normalized[6:].strip()
-        if path:
-            return f"https://avito.ru/{path}"
-    if normalized.startswith("phone:"):
-        digits = normalized[6:].strip().replace(" ", "")
+    prefix, sep, rest = normalized.partition(":")
+    if not sep:
+        return None
+    if prefix == "phone":
+        digits = rest.strip().replace(" ", "")
         if digits and digits.isdigit():
             return f"https://wa.me/{digits}"
+        return None
+    template = _CONTACT_URL_TEMPLATES.get(prefix)
+    path = rest.strip()
+    if template and path:
+        return template.format(path)
     return None
 
 
-def determine_base_type_for_contact(raw_contact: str, user: User) -> BaseType | None:
-    """Определяет тип базы по контакту: по URL или по наличию в выданных/общих базах (как в боте)."""
+def determine_base_type_for_contact(
+    raw_contact: str, user: User, normalized: str | None = None
+) -> BaseType | None:
+    """Определяет тип базы по контакту: по URL или по наличию в выданных/общих базах (как в боте).
+    normalized — уже посчитанный normalize_lead_contact(raw_contact), если есть у вызывающего."""
     if not raw_contact or not raw_contact.strip():
         return None
     contact_lower = raw_contact.strip().lower()
 
     # По URL — только те типы, которые есть в BaseType
     if "instagram.com" in contact_lower:
-        return BaseType.objects.filter(slug="instagram").first()
+        return get_base_type_by_slug("instagram")
     if "vk.com" in contact_lower or "vk.ru" in contact_lower:
-        return BaseType.objects.filter(slug="vk").first()
+        return get_base_type_by_slug("vk")
     if "ok.ru" in contact_lower:
-        return BaseType.objects.filter(slug="ok").first()
-    if "t.me" in contact_lower or contact_lower.startswith("@"):
-        return BaseType.objects.filter(slug="telegram").first()
-    # avito, yula, kwork — нет в BaseType, не подставляем
+        return get_base_type_by_slug("ok")
+    if (
+        "t.me" in contact_lower
+        or "telegram.me" in contact_lower
+        or "telegram.dog" in contact_lower
+        or contact_lower.startswith("@")
+    ):
+        return get_base_type_by_slug("telegram")
+    # avito, yula, kwork — нет в BaseType и в базах контактов не встречаются:
+    # тип однозначен без поиска по таблице контактов
+    if "avito.ru" in contact_lower or "youla.ru" in contact_lower or "kwork.ru" in contact_lower:
+        return None
 
-    # По базе контактов: сначала выданные пользователю, потом вся база
+    # По базе контактов: сначала выданные пользователю, потом вся база.
+    # Ищем по индексу normalized_value (а не value__iexact — это полный скан);
+    # старые записи без normalized_value — по value.
     value_clean = raw_contact.strip()
+    match = Q(normalized_value="", value__iexact=value_clean)
+    if normalized is None:
+        normalized = normalize_lead_contact(value_clean)
+    if normalized:
+        match |= Q(normalized_value=normalized)
     contact = (
-        Contact.objects.filter(
-            Q(value__iexact=value_clean) | Q(value=value_clean),
-            assigned_to=user,
-        )
-        .select_related("base_type")
-        .first()
-    )
-    if contact:
-        return contact.base_type
-    contact = (
-        Contact.objects.filter(
-            Q(value__iexact=value_clean) | Q(value=value_clean),
-        )
+        Contact.objects.filter(match)
+        .annotate(_not_mine=Case(When(assigned_to=user, then=0), default=1))
         .select_related("base_type")
+        .order_by("_not_mine", "id")
         .first()
     )
     if contact:
@@ -181,16 +238,27 @@ def _get_attachment_extension(attachment) -> str | None:
     return None
 
 
+# Путь к ffmpeg ищется один раз на процесс (импорт imageio_ffmpeg, stat, поиск по PATH)
+_FFMPEG_PATH_CACHE = {"path": None, "resolved": False}
+
+
 def _get_ffmpeg_path() -> str | None:
-    """Путь к ffmpeg: imageio-ffmpeg (бандл) или системный."""
+    """Путь к ffmpeg: imageio-ffmpeg (бандл) или системный. Кэшируется в процессе."""
+    if _FFMPEG_PATH_CACHE["resolved"]:
+        return _FFMPEG_PATH_CACHE["path"]
+    path = None
     try:
         import imageio_ffmpeg
         path = imageio_ffmpeg.get_ffmpeg_exe()
-        if path and os.path.isfile(path):
-            return path
+        if not (path and os.path.isfile(path)):
+            path = None
     except Exception:
-        pass
-    return shutil.which("ffmpeg")
+        path = None
+    if not path:
+        path = shutil.which("ffmpeg")
+    _FFMPEG_PATH_CACHE["path"] = path
+    _FFMPEG_PATH_CACHE["resolved"] = True
+    return path
 
 
 def _get_video_duration(ffmpeg_exe: str, path: str) -> float | None:
@@ -286,9 +354,8 @@ def _compress_video_local(path: str) -> bool:
         orig_size = os.path.getsize(path)
         new_size = os.path.getsize(out_path)
         if new_size < orig_size:
-            with open(out_path, "rb") as f:
-                with open(path, "wb") as w:
-                    w.write(f.read())
+            # Копирование средствами ОС (sendfile), без чтения видео целиком в память
+            shutil.copyfile(out_path, path)
             return True
         return False
     finally:
@@ -313,22 +380,20 @@ def _compress_video_remote(lead) -> bool:
     tmp_in = None
     tmp_out = None
     try:
-        with storage.open(name, "rb") as f:
-            data = f.read()
+        # Видео потоково: скачиваем и загружаем кусками, целиком в память не читаем
         fd_in, tmp_in = tempfile.mkstemp(suffix="." + (ext or "mp4"))
-        os.write(fd_in, data)
-        os.close(fd_in)
+        with os.fdopen(fd_in, "wb") as out, storage.open(name, "rb") as f:
+            shutil.copyfileobj(f, out, _COPY_CHUNK_SIZE)
         fd_out, tmp_out = tempfile.mkstemp(suffix=".mp4")
         os.close(fd_out)
         if not _compress_video_ffmpeg(tmp_in, tmp_out):
             return False
-        with open(tmp_out, "rb") as f:
-            compressed = f.read()
-        if len(compressed) >= len(data):
+        if os.path.getsize(tmp_out) >= os.path.getsize(tmp_in):
             return False
         # Сначала загружаем сжатый (S3Storage с file_overwrite=True перезапишет оригинал).
         # Если загрузка упадёт — оригинал останется цел, исключение поймает внешний except.
-        new_name = storage.save(name, ContentFile(compressed))
+        with open(tmp_out, "rb") as f:
+            new_name = storage.save(name, File(f))
         # Если storage вернул другое имя (file_overwrite=False или гонка) —
         # удаляем старый файл и обновляем запись в БД.
         if new_name != name:
@@ -399,7 +464,6 @@ def compress_lead_attachment(lead) -> bool:
                 img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
             buf = io.BytesIO()
             img.save(buf, format="JPEG", quality=82, optimize=True)
-            buf.seek(0)
         with open(path, "wb") as f:
             f.write(buf.getvalue())
         return True
@@ -407,6 +471,29 @@ def compress_lead_attachment(lead) -> bool:
         return False
 
 
+def compress_lead_attachment_in_background(obj) -> None:
+    """Как compress_lead_attachment, но не блокирует запрос на видео.
+
+    Изображения сжимаются сразу (быстро), видео — в фоновом потоке после коммита
+    транзакции: запись перечитывается из БД по pk."""
+    if not obj or not getattr(obj, "attachment", None) or not obj.attachment:
+        return
+    if _get_attachment_extension(obj.attachment) not in LEAD_VIDEO_EXTENSIONS:
+        compress_lead_attachment(obj)
+        return
+    model, pk = type(obj), obj.pk
+
+    def _compress_bg():
+        try:
+            fresh = model.objects.filter(pk=pk).first()
+            if fresh and fresh.attachment:
+                compress_lead_attachment(fresh)
+        except Exception as e:
+            logger.warning("Фоновая компрессия видео (%s %s): %s", model.__name__, pk, e)
+
+    transaction.on_commit(lambda: _bg_executor.submit(_compress_bg))
+
+
 # ─── Реф-milestone для НЕаккредитованных рефоводов ───────────────────────────
 # Две реф-системы (2026-07-13):
 #   • Аккредитованный рефовод (галочка is_accredited) — обычные % с событий
@@ -0,0 +1,18 @@
+# Производительность: последний диалог поддержки пользователя ищется на каждом
+# запросе 20s-поллера (account_updates_api) и дашборда. Только AddIndex.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0093_invited_by"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="supportthread",
+            index=models.Index(fields=["user", "-updated_at"], name="core_suppor_user_id_5c751b_idx"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Производительность: выдача контактов выбирает свободные (assigned_to IS NULL,
+# is_active) строки базы по порядку id. Частичный индекс по свободному пулу.
+# Только AddIndex.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0094_supportthread_user_updated_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                condition=models.Q(("assigned_to__isnull", True), ("is_active", True)),
+                fields=["base_type", "id"],
+                name="contact_free_pool_idx",
+            ),
+        ),
+    ]
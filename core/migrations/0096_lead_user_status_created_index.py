@@ -0,0 +1,23 @@
+# Производительность: счётчики лидов пользователя за день/вчера/всего фильтруют
+# (user, status) и диапазон created_at. Индекс (user, status) расширен до
+# (user, status, created_at) — прежний становится его префиксом и удаляется.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0095_contact_free_pool_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lead",
+            index=models.Index(fields=["user", "status", "created_at"], name="core_lead_user_id_abeefb_idx"),
+        ),
+        migrations.RemoveIndex(
+            model_name="lead",
+            name="core_lead_user_id_737708_idx",
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Производительность: «мои контакты» (просмотр, .txt, счётчики по базам)
+# выбирают выданные пользователю строки с фильтром по базе и сортировкой по
+# assigned_at. Составной индекс вместо скана всех контактов пользователя.
+# Только AddIndex.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0096_lead_user_status_created_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contact",
+            index=models.Index(
+                fields=["assigned_to", "base_type", "assigned_at"],
+                name="contact_user_issued_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Производительность: проверка дубликата лида (сайт и кабинет исполнителя)
+# ищет WorkerSelfLead по raw_contact__iexact, т.е. UPPER(raw_contact) = UPPER(%s).
+# Индекс по выражению UPPER(raw_contact) вместо полного скана таблицы.
+# Только AddIndex.
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0097_contact_user_issued_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="workerselflead",
+            index=models.Index(
+                django.db.models.functions.text.Upper("raw_contact"),
+                name="selflead_raw_contact_upper_idx",
+            ),
+        ),
+    ]
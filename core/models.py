@@ -3,7 +3,9 @@ from __future__ import annotations
 from uuid import uuid4
 
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 
@@ -372,13 +374,32 @@ class Contact(TimeStampedModel):
 
     class Meta:
         unique_together = ("base_type", "value")
+        indexes = [
+            # Свободный пул базы (выдача берёт первые N по id): частичный индекс
+            # только по невыданным активным контактам — ответ «не хватает» и выборка
+            # пачки не сканируют уже выданную часть базы.
+            models.Index(
+                fields=["base_type", "id"],
+                name="contact_free_pool_idx",
+                condition=models.Q(assigned_to__isnull=True, is_active=True),
+            ),
+            # Выданные пользователю контакты (по базе, в порядке выдачи) —
+            # «Мои контакты», выгрузка .txt и счётчики по базам
+            models.Index(
+                fields=["assigned_to", "base_type", "assigned_at"],
+                name="contact_user_issued_idx",
+            ),
+        ]
         verbose_name = "Контакт"
         verbose_name_plural = "Контакты"
 
     def save(self, *args, **kwargs):
-        # Поддерживаем normalized_value в актуальном состоянии при любой записи
-        from .lead_utils import normalize_lead_contact
-        self.normalized_value = normalize_lead_contact(self.value or "")
+        # Поддерживаем normalized_value в актуальном состоянии при любой записи value.
+        # save(update_fields=[...]) без value (выдача, деактивация) его не трогает.
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "value" in update_fields:
+            from .lead_utils import normalize_lead_contact
+            self.normalized_value = normalize_lead_contact(self.value or "")
         super().save(*args, **kwargs)
 
     def __str__(self) -> str:  # pragma: no cover - простое представление
@@ -548,7 +569,9 @@ class Lead(TimeStampedModel):
         verbose_name_plural = "Лиды"
         indexes = [
             models.Index(fields=["status", "-created_at"]),
-            models.Index(fields=["user", "status"]),
+            # Статистика пользователя: approved за сегодня/вчера/всего — диапазон
+            # по created_at внутри (user, status) берётся прямо из индекса
+            models.Index(fields=["user", "status", "created_at"]),
             models.Index(fields=["reviewed_at"]),
         ]
 
@@ -613,6 +636,10 @@ class SupportThread(TimeStampedModel):
     class Meta:
         verbose_name = "Диалог поддержки"
         verbose_name_plural = "Диалоги поддержки"
+        indexes = [
+            # Последний диалог пользователя (20s-поллер, дашборд) — без сортировки
+            models.Index(fields=["user", "-updated_at"]),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - простое представление
         return f"Поддержка: {self.user} ({'закрыт' if self.is_closed else 'активен'})"
@@ -1082,6 +1109,11 @@ class WorkerSelfLead(TimeStampedModel):
         verbose_name = "Лид от исполнителя"
         verbose_name_plural = "Лиды от исполнителей"
         ordering = ["-created_at"]
+        indexes = [
+            # Проверка дубля при каждой подаче лида идёт по raw_contact__iexact
+            # (UPPER(raw_contact) = UPPER(%s)) — индекс по выражению вместо полного скана
+            models.Index(Upper("raw_contact"), name="selflead_raw_contact_upper_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Лид от @{self.worker.username}: {self.raw_contact} ({self.get_status_display()})"
@@ -1189,6 +1221,12 @@ def site_settings_upload_to(instance, filename: str) -> str:
     return f"site/{uuid4().hex[:12]}.{ext}"
 
 
+# Настройки для отображения держим в общем кэше Django (Redis при REDIS_URL),
+# чтобы сброс при save() был виден всем воркерам.
+SITE_SETTINGS_CACHE_KEY = "core:site_settings"
+SITE_SETTINGS_CACHE_SECONDS = 60
+
+
 class SiteSettings(models.Model):
     """Настройки сайта. Одна запись на весь сайт."""
     example_video = models.FileField(
@@ -1245,10 +1283,29 @@ class SiteSettings(models.Model):
 
     @classmethod
     def get_settings(cls):
-        """Получить или создать единственную запись настроек."""
+        """Получить или создать единственную запись настроек (всегда из БД)."""
         obj, _ = cls.objects.get_or_create(pk=1)
         return obj
 
+    @classmethod
+    def get_cached_settings(cls):
+        """Настройки только для отображения (из кэша, до SITE_SETTINGS_CACHE_SECONDS).
+        Для записи и проверок (секрет zvonok, автоодобрение) — get_settings()."""
+        obj = cache.get(SITE_SETTINGS_CACHE_KEY)
+        if obj is None:
+            obj = cls.get_settings()
+            cache.set(SITE_SETTINGS_CACHE_KEY, obj, SITE_SETTINGS_CACHE_SECONDS)
+        return obj
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        clear_site_settings_cache()
+
+
+def clear_site_settings_cache() -> None:
+    """Сбросить кэш SiteSettings (после изменения настроек)."""
+    cache.delete(SITE_SETTINGS_CACHE_KEY)
+
 
 class BalanceLog(models.Model):
     """Лог всех операций с балансом пользователя."""
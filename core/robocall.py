@@ -16,6 +16,7 @@ import re
 import secrets
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 from django.utils import timezone
@@ -27,11 +28,14 @@ CALLS_BY_PHONE_URL = "https://zvonok.com/manager/cabapi_external/api/v1/phones/c
 POLL_THROTTLE = timedelta(minutes=55)
 # Максимум отчётов за один cron-проход (защита от долгих run'ов)
 POLL_BATCH_SIZE = 200
+# Параллельных запросов к zvonok за проход (ответы ждём одновременно, а не по очереди)
+POLL_CONCURRENCY = 8
+_NON_DIGIT_RE = re.compile(r"\D")
 
 
 def normalize_phone(phone: str) -> str | None:
     """Приводит номер к международному формату +7XXXXXXXXXX (или None если битый)."""
-    digits = re.sub(r"\D", "", phone or "")
+    digits = _NON_DIGIT_RE.sub("", phone or "")
     if not digits:
         return None
     if digits.startswith("8") and len(digits) == 11:
@@ -119,18 +123,36 @@ def poll_incoming_calls() -> dict:
     )
 
     checked = confirmed = no_call = errors = skipped_throttle = 0
+    due = []
     for report in qs[:POLL_BATCH_SIZE]:
         if report.zvonok_last_polled_at and report.zvonok_last_polled_at > cutoff:
             skipped_throttle += 1
             continue
+        due.append((report, normalize_phone(report.client_phone) or report.client_phone))
 
-        phone = normalize_phone(report.client_phone) or report.client_phone
+    def _fetch(phone: str):
         try:
-            code, parsed, raw = _fetch_calls_by_phone(st.zvonok_public_key, campaign_id, phone)
+            return _fetch_calls_by_phone(st.zvonok_public_key, campaign_id, phone)
         except Exception as e:
-            logger.exception("poll_incoming_calls: report=%s phone=%s exception: %s", report.pk, phone, e)
+            return e
+
+    # HTTP-запросы независимы — идут пачкой в пуле потоков; сохранение в БД
+    # остаётся в текущем потоке, в исходном порядке отчётов.
+    if len(due) > 1:
+        with ThreadPoolExecutor(max_workers=min(POLL_CONCURRENCY, len(due))) as pool:
+            results = list(pool.map(_fetch, [phone for _report, phone in due]))
+    else:
+        results = [_fetch(phone) for _report, phone in due]
+
+    for (report, phone), result in zip(due, results):
+        if isinstance(result, Exception):
+            logger.error(
+                "poll_incoming_calls: report=%s phone=%s exception: %s",
+                report.pk, phone, result, exc_info=result,
+            )
             errors += 1
             continue
+        code, parsed, raw = result
 
         report.zvonok_last_polled_at = now
         update_fields = ["zvonok_last_polled_at", "updated_at"]
@@ -63,11 +63,24 @@ def _fetch_wg_state(links: list) -> dict:
     vk_peer_id >= 2_000_000_000 (CHAT_PEER_OFFSET). У VK group_chat_id почти
     всегда пустой, поэтому без учёта беседы VK-клиенты с чатом висли бы на «бот».
     """
-    tg_ids = sorted({l.telegram_id for l in links if l.telegram_id})
-    unames = sorted({l.telegram_username.lower() for l in links if l.telegram_username})
-    vk_ids = sorted({l.vk_user_id for l in links if l.vk_user_id})
-    vk_screens = sorted({l.vk_screen_name.lower() for l in links
-                         if l.vk_screen_name and not l.vk_user_id})
+    # Ключи матча — одним проходом по ссылкам
+    tg_set: set[int] = set()
+    uname_set: set[str] = set()
+    vk_set: set[int] = set()
+    vk_screen_set: set[str] = set()
+    for l in links:
+        if l.telegram_id:
+            tg_set.add(l.telegram_id)
+        if l.telegram_username:
+            uname_set.add(l.telegram_username.lower())
+        if l.vk_user_id:
+            vk_set.add(l.vk_user_id)
+        elif l.vk_screen_name:
+            vk_screen_set.add(l.vk_screen_name.lower())
+    tg_ids = sorted(tg_set)
+    unames = sorted(uname_set)
+    vk_ids = sorted(vk_set)
+    vk_screens = sorted(vk_screen_set)
     if not (tg_ids or unames or vk_ids or vk_screens):
         return {}
 
@@ -170,7 +183,7 @@ def baseline_searchlink_funnel(dry_run: bool = True) -> dict:
     links = list(SearchLink.objects.filter(bot_started=True)
                  .only("id", "funnel_stage", "chat_created", "wg_conversation_id", "wg_status",
                        "chat_credited_at", "sozvon_credited_at", "deal_credited_at",
-                       "telegram_id", "telegram_username", "vk_user_id"))
+                       "telegram_id", "telegram_username", "vk_user_id", "vk_screen_name"))
     summary = {"checked": len(links), "matched": 0,
                "would_mark_sozvon": 0, "would_mark_deal": 0, "stage2": 0, "stage3": 0, "stage4": 0}
     if not links:
@@ -246,7 +259,7 @@ def sync_searchlink_funnel(link_ids: list | None = None, dry_run: bool = False)
     links = list(qs.select_related("user", "user__partner_owner")
                  .only("id", "funnel_stage", "chat_created", "wg_conversation_id", "wg_status",
                        "chat_credited_at", "sozvon_credited_at", "deal_credited_at",
-                       "telegram_id", "telegram_username", "vk_user_id",
+                       "telegram_id", "telegram_username", "vk_user_id", "vk_screen_name",
                        "user__id", "user__partner_owner"))
     summary = {"checked": len(links), "stage_updated": 0,
                "sozvon_credited": 0, "deal_credited": 0,
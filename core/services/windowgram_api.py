@@ -7,18 +7,19 @@
   2) login_manager(user)    — получает свежий JWT (на лету, не кешируем).
   3) create_chat(jwt, ...)  — создаёт TG-чат через invite-pool.
   4) send_summary(...)      — Bearer-auth, шлёт сводку (Номер/Дата/Время)
-     от notify_bot в чат.
+     от notify_bot в чат (из вьюх — через send_summary_background).
   5) validate_chat(chat_id) — Bearer-auth, проверяет:
         • есть ли админ (artem_tele2 / shaneli77) в чате
         • зашёл ли клиент
 
-Все вызовы — синхронные через requests, с короткими таймаутами и graceful-fail.
+Все вызовы — синхронные через общую requests.Session, с короткими таймаутами и graceful-fail.
 """
 
 from __future__ import annotations
 
 import logging
 import secrets
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
@@ -30,6 +31,13 @@ WINDOWGRAM_API_KEY = "p9EMWO1uPz75wFTEh2JS0Vo2oYtdAeyOs0veeH9FVu8"
 
 DEFAULT_TIMEOUT = 30  # секунд (создание чата может идти 10-20с)
 
+# Одна сессия на процесс: keep-alive к murzzvon.ru, цепочка
+# auto-register → login → create-chat идёт по одному TLS-соединению
+_session = requests.Session()
+
+# Фоновые вызовы, результат которых не нужен для ответа менеджеру (сводка в чат)
+_bg_executor = ThreadPoolExecutor(max_workers=2)
+
 
 class WindowgramError(Exception):
     """Любая проблема при общении с windowgram. message можно показать менеджеру."""
@@ -63,7 +71,7 @@ def _manager_login_for_user(user) -> str:
             "Попробуйте ещё раз — мы создадим её автоматически."
         )
     try:
-        r = requests.post(
+        r = _session.post(
             f"{WINDOWGRAM_BASE_URL}/api/manager/login",
             json={"login": login, "password": password},
             timeout=DEFAULT_TIMEOUT,
@@ -93,7 +101,7 @@ def ensure_manager(user) -> None:
     login = _bridge_login_for_user(user)
 
     try:
-        r = requests.post(
+        r = _session.post(
             f"{WINDOWGRAM_BASE_URL}/api/managers/auto-register",
             headers=_bearer_headers(),
             json={
@@ -136,7 +144,7 @@ def create_chat(user, title: str) -> dict:
     ensure_manager(user)
     jwt = _manager_login_for_user(user)
     try:
-        r = requests.post(
+        r = _session.post(
             f"{WINDOWGRAM_BASE_URL}/api/manager/create-chat",
             headers={"Authorization": f"Bearer {jwt}"},
             json={"title": title[:128], "purpose": "cold_contact"},
@@ -166,7 +174,7 @@ def send_summary(chat_id: int, phone: str, date_str: str, time_str: str) -> None
     с purpose='cold_contact' (валидируется на стороне windowgram).
     """
     try:
-        r = requests.post(
+        r = _session.post(
             f"{WINDOWGRAM_BASE_URL}/api/manager/chats/{chat_id}/send-summary",
             headers=_bearer_headers(),
             json={"phone": phone, "date": date_str, "time": time_str},
@@ -181,6 +189,19 @@ def send_summary(chat_id: int, phone: str, date_str: str, time_str: str) -> None
         )
 
 
+def send_summary_background(chat_id: int, phone: str, date_str: str, time_str: str) -> None:
+    """send_summary в фоновом потоке: редирект менеджеру не ждёт notify_bot
+    (до DEFAULT_TIMEOUT секунд). Ошибки только логируются — как и в send_summary."""
+
+    def _run():
+        try:
+            send_summary(chat_id, phone, date_str, time_str)
+        except Exception:
+            logger.exception("send_summary background failed for chat %s", chat_id)
+
+    _bg_executor.submit(_run)
+
+
 def validate_chat(chat_id: int) -> tuple[bool, str]:
     """Проверка состояния чата на windowgram-стороне.
 
@@ -194,7 +215,7 @@ def validate_chat(chat_id: int) -> tuple[bool, str]:
     если хотя бы одно условие не выполнено.
     """
     try:
-        r = requests.get(
+        r = _session.get(
             f"{WINDOWGRAM_BASE_URL}/api/manager/chats/{chat_id}/validation",
             headers=_bearer_headers(),
             timeout=DEFAULT_TIMEOUT,
@@ -42,6 +42,22 @@ def clear_media_config_cache():
     _MEDIA_CONFIG_CACHE["cache_until"] = 0
 
 
+def warm_up_env_s3_storage():
+    """Заранее создаёт boto3-клиент S3 из окружения (USE_S3_MEDIA_ENV), один раз на процесс.
+
+    Сессия botocore (загрузка JSON-моделей сервиса, ключи) строится лениво при первой
+    загрузке файла — т.е. в каждом воркере на живом запросе. При preload_app Gunicorn
+    вызов из wsgi.py делает это в мастере до fork: воркеры наследуют готовый клиент.
+    Соединения при этом не открываются. Не бросает исключений."""
+    if not getattr(settings, "USE_S3_MEDIA_ENV", False) or not getattr(settings, "AWS_STORAGE_BUCKET_NAME", ""):
+        return
+    try:
+        from django.core.files.storage import default_storage
+        default_storage.connection
+    except Exception as e:
+        logger.warning("Media storage: не удалось заранее создать S3-клиент: %s", e)
+
+
 def get_media_storage_diagnostic():
     """
     Диагностика хранилища медиа: откуда берётся S3 (env или БД) и подключается ли он.
@@ -27,6 +27,7 @@ def contact_link(value):
 
 import re as _re
 _PHONE_RE = _re.compile(r"^\s*[\+]?[\d\-\s\(\)]{10,20}\s*$")
+_NON_DIGIT_RE = _re.compile(r"\D")
 
 
 @register.filter
@@ -44,7 +45,7 @@ def phone_pretty(value):
         return ""
     if not _PHONE_RE.match(text):
         return text
-    digits = _re.sub(r"\D", "", text)
+    digits = _NON_DIGIT_RE.sub("", text)
     if not digits or len(digits) < 10:
         return text
     if digits.startswith("8") and len(digits) == 11:
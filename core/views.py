@@ -1,6 +1,6 @@
 import logging
+import re
 from functools import wraps
-from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, time, timedelta, timezone as dt_utc
 from zoneinfo import ZoneInfo
 
@@ -18,9 +18,7 @@ from django.utils import timezone
 
 from .forms import BaseRequestForm, DozhimLeadReportForm, LeadReportForm, LeadReworkUserForm, UserRegistrationForm
 from .lead_utils import (
-    LEAD_VIDEO_EXTENSIONS,
-    _get_attachment_extension,
-    compress_lead_attachment,
+    compress_lead_attachment_in_background,
     determine_base_type_for_contact,
     extract_username_from_contact,
     normalize_lead_contact,
@@ -31,7 +29,8 @@ from .models import BaseType, Contact, ContactRequest, DozhimIssuedLead, Lead, L
 
 logger = logging.getLogger(__name__)
 
-_bg_executor = ThreadPoolExecutor(max_workers=1)
+# «#<link_pk>» в reason начислений баланс-админа
+_REASON_LINK_PK_RE = re.compile(r"#(\d+)")
 
 
 def health_check(request: HttpRequest) -> HttpResponse:
@@ -239,7 +238,6 @@ def dashboard(request: HttpRequest) -> HttpResponse:
     if _is_partner(user):
         return redirect("partner_dashboard")
     if _is_balance_admin(user):
-        import re as _re
         from django.db.models import Q as _Q
         from .models import BalanceLog, SearchLink
 
@@ -259,7 +257,7 @@ def dashboard(request: HttpRequest) -> HttpResponse:
         # reason вида "chat_varvara#<link_pk> +N", тянем SearchLink одним запросом.
         _link_ids = []
         for lg in fee_logs:
-            m = _re.search(r"#(\d+)", lg.reason or "")
+            m = _REASON_LINK_PK_RE.search(lg.reason or "")
             lg.link_pk = int(m.group(1)) if m else None
             if lg.link_pk:
                 _link_ids.append(lg.link_pk)
@@ -557,6 +555,8 @@ def dashboard(request: HttpRequest) -> HttpResponse:
             ).exists()
     # Лиды, отправленные админом на доработку — показываем уведомление на главной
     rework_leads_count = Lead.objects.filter(user=user, status=Lead.Status.REWORK).count()
+    # Тот же счётчик нужен контекст-процессору колокольчика — не считаем дважды
+    request._rework_leads_count = rework_leads_count
     # GroupReport (бета) на доработке — для бейджа в дашборде менеджера
     rework_group_reports_count = 0
     if getattr(user, "can_create_group_reports", False):
@@ -617,11 +617,8 @@ def account_updates_api(request: HttpRequest) -> HttpResponse:
     balance = getattr(user, "balance", 0) or 0
     # Для role=admin/main_admin баланс считается из LeadReviewLog
     if getattr(user, "role", None) in ("admin", "main_admin"):
-        from django.db.models import Sum
-        from .admin_earnings import total_earned as _ae_total_earned
-        _admin_earned = _ae_total_earned(user)
-        _admin_withdrawn = WithdrawalRequest.objects.filter(user=user, status__in=("pending", "approved")).aggregate(s=Sum("amount")).get("s") or 0
-        balance = max(0, _admin_earned - _admin_withdrawn)
+        from .admin_earnings import cached_admin_balance
+        balance = cached_admin_balance(user)
     dozhim_balance = getattr(user, "dozhim_balance", 0) or 0
     data = {
         "support_has_unread": False,
@@ -698,6 +695,37 @@ def _ensure_user_approved(request: HttpRequest) -> bool:
     return True
 
 
+def _issued_counts(user) -> dict[int, int]:
+    """{base_type_id: кол-во выданных пользователю контактов} — один GROUP BY."""
+    return dict(
+        Contact.objects.filter(assigned_to=user)
+        .values_list("base_type_id")
+        .annotate(count=Count("id"))
+        .values_list("base_type_id", "count")
+    )
+
+
+def _issued_by_base(user, counts: dict[int, int] | None = None) -> list[tuple[BaseType, int]]:
+    """Список (база, кол-во выданных пользователю контактов) в порядке баз.
+    counts — уже посчитанный _issued_counts (иначе считаем); типы баз — из кэша процесса."""
+    from .lead_utils import get_base_types
+
+    if counts is None:
+        counts = _issued_counts(user)
+    if not counts:
+        return []
+    return [(base, counts[base.id]) for base in get_base_types() if counts.get(base.id)]
+
+
+def _base_type_from_param(raw_id: str | None) -> BaseType | None:
+    """BaseType по id из GET-параметра — из кэша процесса, без запроса к БД."""
+    from .lead_utils import get_base_types
+
+    if not raw_id:
+        return None
+    return next((bt for bt in get_base_types() if str(bt.pk) == raw_id.strip()), None)
+
+
 @login_required
 def contacts_placeholder(request: HttpRequest) -> HttpResponse:
     """Страница получения списков контактов с учётом лимитов."""
@@ -710,6 +738,11 @@ def contacts_placeholder(request: HttpRequest) -> HttpResponse:
     selected_base: BaseType | None = None
     reason: str | None = None
 
+    # Выданное пользователю по базам считаем один раз: отсюда и текущий лимит
+    # по выбранной базе, и список для «Скачать .txt» после выдачи (досчитываем
+    # выданное сейчас, без повторного прохода по контактам).
+    issued_counts = _issued_counts(user) if user.is_authenticated else {}
+
     if request.method == "POST" and form.is_valid():
         selected_base = form.cleaned_data["base_type"]
 
@@ -728,7 +761,7 @@ def contacts_placeholder(request: HttpRequest) -> HttpResponse:
                 can_give = base_limit
                 partial_ok = True
             else:
-                current = Contact.objects.filter(base_type=selected_base, assigned_to=user).count()
+                current = issued_counts.get(selected_base.id, 0)
                 if current >= total_allowed:
                     reason = "already_got"
                     can_give = 0
@@ -737,21 +770,24 @@ def contacts_placeholder(request: HttpRequest) -> HttpResponse:
                 partial_ok = False
 
             if can_give > 0:
+                # skip_locked — только когда можно выдать неполную пачку: параллельная
+                # выдача берёт следующие свободные строки, а не ждёт первую транзакцию.
+                # При выдаче строго по лимиту ждём блокировки, иначе чужие заблокированные
+                # строки дали бы ложное «not_enough».
                 free_qs = (
-                    Contact.objects.select_for_update()
+                    Contact.objects.select_for_update(skip_locked=partial_ok)
                     .filter(base_type=selected_base, assigned_to__isnull=True, is_active=True)
                     .order_by("id")
                 )
                 # ─── Глобальный антидубль ───
                 # 1. Не выдаём value, уже выданное ТЕКУЩЕМУ юзеру (по value, для
                 #    обратной совместимости со старыми записями где normalized_value="").
-                already_issued_values = set(
-                    Contact.objects.filter(assigned_to=user)
+                #    Подзапросом: множество считает БД, без выгрузки значений в Python.
+                free_qs = free_qs.exclude(
+                    value__in=Contact.objects.filter(assigned_to=user)
                     .exclude(base_type=selected_base)
-                    .values_list("value", flat=True)
+                    .values("value")
                 )
-                if already_issued_values:
-                    free_qs = free_qs.exclude(value__in=already_issued_values)
                 # 2. Главное: один и тот же НОМЕР/НИК (нормализованный) не должен
                 #    попадать ДВУМ разным менеджерам через разные базы. Исключаем
                 #    любой Contact, чей normalized_value уже выдан кому угодно.
@@ -762,13 +798,15 @@ def contacts_placeholder(request: HttpRequest) -> HttpResponse:
                     assigned_to__isnull=False,
                 ).exclude(normalized_value="")
                 free_qs = free_qs.annotate(_taken=Exists(taken_subq)).filter(_taken=False)
-                free_count = free_qs.count()
+                # Не считаем COUNT(*) по всему свободному пулу (с антидубль-подзапросами
+                # на каждую строку): достаточно взять до can_give строк — по их числу
+                # и видно, хватает ли контактов.
+                contacts_to_give = list(free_qs[:can_give])
+                free_count = len(contacts_to_give)
                 if free_count == 0 or (not partial_ok and free_count < can_give):
                     reason = "not_enough"
                 else:
                     now = timezone.now()
-                    actual_give = min(can_give, free_count)
-                    contacts_to_give = list(free_qs[:actual_give])
                     ids = [c.pk for c in contacts_to_give]
                     Contact.objects.filter(pk__in=ids).update(
                         assigned_to=user, assigned_at=now
@@ -778,6 +816,9 @@ def contacts_placeholder(request: HttpRequest) -> HttpResponse:
                         c.assigned_to = user
                         c.assigned_at = now
                     allocated_contacts = contacts_to_give
+                    issued_counts[selected_base.id] = (
+                        issued_counts.get(selected_base.id, 0) + len(contacts_to_give)
+                    )
 
         if allocated_contacts:
             messages.success(
@@ -786,18 +827,7 @@ def contacts_placeholder(request: HttpRequest) -> HttpResponse:
             )
 
     # Выданные пользователю контакты по базам (для кнопки «Скачать .txt»)
-    issued_by_base = []
-    if user.is_authenticated:
-        from django.db.models import Count
-
-        counts = dict(
-            Contact.objects.filter(assigned_to=user)
-            .values_list("base_type_id")
-            .annotate(count=Count("id"))
-            .values_list("base_type_id", "count")
-        )
-        for base in BaseType.objects.filter(id__in=counts).order_by("order"):
-            issued_by_base.append((base, counts[base.id]))
+    issued_by_base = _issued_by_base(user, issued_counts) if user.is_authenticated else []
 
     return render(
         request,
@@ -819,13 +849,7 @@ def contacts_view(request: HttpRequest) -> HttpResponse:
     if not _ensure_user_approved(request):
         return redirect("dashboard")
 
-    base_type_id = request.GET.get("base_type")
-    base_type = None
-    if base_type_id:
-        try:
-            base_type = BaseType.objects.get(pk=base_type_id)
-        except (BaseType.DoesNotExist, ValueError):
-            pass
+    base_type = _base_type_from_param(request.GET.get("base_type"))
 
     qs = Contact.objects.filter(assigned_to=user, assigned_at__isnull=False)
     if base_type:
@@ -840,16 +864,7 @@ def contacts_view(request: HttpRequest) -> HttpResponse:
         page_obj = paginator.page(1)
 
     # Список баз для ссылок на страницу (все базы с выданными контактами)
-    from django.db.models import Count
-    issued_by_base = []
-    counts = dict(
-        Contact.objects.filter(assigned_to=user)
-        .values_list("base_type_id")
-        .annotate(count=Count("id"))
-        .values_list("base_type_id", "count")
-    )
-    for b in BaseType.objects.filter(id__in=counts).order_by("order"):
-        issued_by_base.append((b, counts[b.id]))
+    issued_by_base = _issued_by_base(user)
 
     return render(
         request,
@@ -876,57 +891,61 @@ def download_my_contacts_txt(request: HttpRequest) -> HttpResponse:
     base_type_id = request.GET.get("base_type")
     date_str = request.GET.get("date")
 
-    base_type = None
-    if base_type_id:
-        try:
-            base_type = BaseType.objects.get(pk=base_type_id)
-        except (BaseType.DoesNotExist, ValueError):
-            return HttpResponse("Неверная база.", status=400)
+    base_type = _base_type_from_param(base_type_id)
+    if base_type_id and base_type is None:
+        return HttpResponse("Неверная база.", status=400)
 
     filter_date = None
     if date_str:
         try:
-            filter_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            filter_date = date.fromisoformat(date_str)
         except ValueError:
             pass
 
-    qs = Contact.objects.filter(assigned_to=user, assigned_at__isnull=False)
+    from django.db.models.functions import TruncDate
+
+    # День выдачи (в TIME_ZONE) считает БД — без astimezone() на каждой строке в Python;
+    # фильтр по дате — тоже в запросе, лишние строки не выгружаются.
+    qs = Contact.objects.filter(assigned_to=user, assigned_at__isnull=False).annotate(
+        _day=TruncDate("assigned_at", tzinfo=tz)
+    )
     if base_type:
         qs = qs.filter(base_type=base_type)
+    if filter_date:
+        qs = qs.filter(_day=filter_date)
     qs = qs.order_by("assigned_at")
 
+    # Строки файла копим одним плоским списком и склеиваем один раз: без
+    # промежуточных «заголовок + блок» строк, копирующих весь блок дня.
+    # qs отсортирован по assigned_at, значит дни идут по возрастанию.
+    lines: list[str] = []
     if base_type:
-        rows = list(qs.values_list("value", "assigned_at"))
-        by_date = OrderedDict()
-        for value, assigned_at in rows:
-            d = assigned_at.astimezone(tz).date()
-            if filter_date and d != filter_date:
-                continue
-            by_date.setdefault(d, []).append(value)
-        parts = []
-        for d in sorted(by_date.keys()):
-            parts.append("=== %s ===" % d.strftime("%d.%m.%Y") + "\n" + "\n".join(by_date[d]))
-        content = "\n\n".join(parts) if parts else ""
+        current_day = None
+        for value, d in qs.values_list("value", "_day"):
+            if d != current_day:
+                if current_day is not None:
+                    lines.append("")
+                lines.append("=== %s ===" % d.strftime("%d.%m.%Y"))
+                current_day = d
+            lines.append(value)
+        content = "\n".join(lines)
         slug = base_type.slug
         filename = f"contacts_{slug}_{filter_date}.txt" if filter_date else f"contacts_{slug}.txt"
     else:
-        rows = list(qs.values_list("value", "assigned_at", "base_type__name"))
         by_date = OrderedDict()
-        for value, assigned_at, base_name in rows:
-            d = assigned_at.astimezone(tz).date()
-            if filter_date and d != filter_date:
-                continue
+        for value, d, base_name in qs.values_list("value", "_day", "base_type__name"):
             by_date.setdefault(d, []).append((value, base_name or ""))
-        parts = []
-        for d in sorted(by_date.keys()):
-            day_lines = ["=== %s ===" % d.strftime("%d.%m.%Y")]
+        for d, day_values in by_date.items():
+            if lines:
+                lines.append("")
+            lines.append("=== %s ===" % d.strftime("%d.%m.%Y"))
             by_base = OrderedDict()
-            for value, base_name in by_date[d]:
+            for value, base_name in day_values:
                 by_base.setdefault(base_name, []).append(value)
             for base_name, values in by_base.items():
-                day_lines.append("=== %s ===" % base_name + "\n" + "\n".join(values))
-            parts.append("\n".join(day_lines))
-        content = "\n\n".join(parts) if parts else ""
+                lines.append("=== %s ===" % base_name)
+                lines.extend(values)
+        content = "\n".join(lines)
         filename = f"contacts_all_{filter_date}.txt" if filter_date else "contacts_all.txt"
 
     if filter_date and not content.strip():
@@ -1001,6 +1020,9 @@ def withdrawal_cancel_own(request: HttpRequest, wr_id: int) -> HttpResponse:
         wr_locked.status = "rejected"
         wr_locked.processed_at = timezone.now()
         wr_locked.save(update_fields=["status", "processed_at"])
+    if _role in ("admin", "main_admin"):
+        from .admin_earnings import clear_admin_balance_cache
+        clear_admin_balance_cache(user.pk)
     messages.success(request, f"Заявка на вывод {wr.amount} ₽ отменена. Средства снова доступны.")
     return redirect("request_withdrawal_create")
 
@@ -1182,6 +1204,8 @@ def request_withdrawal_create(request: HttpRequest) -> HttpResponse:
                     payout_details=payout_details,
                     status="pending",
                 )
+                from .admin_earnings import clear_admin_balance_cache
+                clear_admin_balance_cache(user_refresh.pk)
             else:
                 if dept == "dozhim":
                     current_balance = getattr(user_refresh, "dozhim_balance", 0) or 0
@@ -1309,17 +1333,15 @@ def _issue_base_for_accredited(user, base_type) -> int:
     with transaction.atomic():
         from django.db.models import Exists, OuterRef
         free_qs = (
-            Contact.objects.select_for_update()
+            Contact.objects.select_for_update(skip_locked=True)
             .filter(base_type=base_type, assigned_to__isnull=True, is_active=True)
             .order_by("id")
         )
-        already_issued_values = set(
-            Contact.objects.filter(assigned_to=user)
+        free_qs = free_qs.exclude(
+            value__in=Contact.objects.filter(assigned_to=user)
             .exclude(base_type=base_type)
-            .values_list("value", flat=True)
+            .values("value")
         )
-        if already_issued_values:
-            free_qs = free_qs.exclude(value__in=already_issued_values)
         # Глобальный антидубль по нормализованному value
         taken_subq = Contact.objects.filter(
             normalized_value=OuterRef("normalized_value"),
@@ -1336,9 +1358,12 @@ def _issue_base_for_accredited(user, base_type) -> int:
         return len(contacts_to_give)
 
 
-def _dozhim_lead_exists(raw_contact: str, exclude_lead_id: int | None = None) -> bool:
+def _dozhim_lead_exists(
+    raw_contact: str, exclude_lead_id: int | None = None, normalized: str | None = None
+) -> bool:
     """Проверяет дубликат контакта ТОЛЬКО среди дожим-лидов."""
-    normalized = normalize_lead_contact(raw_contact)
+    if normalized is None:
+        normalized = normalize_lead_contact(raw_contact)
     if not normalized:
         return False
     try:
@@ -1362,10 +1387,14 @@ def _dozhim_lead_exists(raw_contact: str, exclude_lead_id: int | None = None) ->
         return False
 
 
-def _lead_exists_globally(raw_contact: str, exclude_lead_id: int | None = None) -> bool:
-    """Проверяет, есть ли в базе уже лид с таким контактом (любой пользователь). Комплексная нормализация: @user=user, ссылки и т.д."""
+def _lead_exists_globally(
+    raw_contact: str, exclude_lead_id: int | None = None, normalized: str | None = None
+) -> bool:
+    """Проверяет, есть ли в базе уже лид с таким контактом (любой пользователь). Комплексная нормализация: @user=user, ссылки и т.д.
+    normalized — уже посчитанный normalize_lead_contact(raw_contact), чтобы не нормализовать повторно."""
     from .models import WorkerSelfLead
-    normalized = normalize_lead_contact(raw_contact)
+    if normalized is None:
+        normalized = normalize_lead_contact(raw_contact)
     if not normalized:
         return False
     try:
@@ -1417,7 +1446,9 @@ def leads_report_placeholder(request: HttpRequest) -> HttpResponse:
         form = LeadReportForm(request.POST, request.FILES)
         if form.is_valid():
             raw = form.cleaned_data.get("raw_contact") or ""
-            if _lead_exists_globally(raw):
+            # Нормализуем один раз: проверка дублей, поле лида и поиск базы
+            normalized = normalize_lead_contact(raw)
+            if _lead_exists_globally(raw, normalized=normalized):
                 messages.error(
                     request,
                     "Такой контакт уже есть в базе отчётов (у вас или другого пользователя). "
@@ -1429,26 +1460,14 @@ def leads_report_placeholder(request: HttpRequest) -> HttpResponse:
                     lead.user = user
                     raw_safe = (lead.raw_contact or "").strip()
                     lead.source = raw_safe or ""
-                    lead.normalized_contact = normalize_lead_contact(lead.raw_contact or "")
-                    lead.base_type = determine_base_type_for_contact(raw_safe, user)
+                    lead.normalized_contact = normalized
+                    lead.base_type = determine_base_type_for_contact(raw_safe, user, normalized)
                     contact_qs = Contact.objects.filter(value=raw_safe)
                     if lead.base_type:
                         contact_qs = contact_qs.filter(base_type=lead.base_type)
                     lead.contact = contact_qs.first()
                     lead.save()
-                    ext = _get_attachment_extension(lead.attachment)
-                    if ext in LEAD_VIDEO_EXTENSIONS:
-                        lead_id = lead.id
-                        def _compress_video_bg(lid=lead_id):
-                            try:
-                                l = Lead.objects.filter(pk=lid).select_related().first()
-                                if l and l.attachment:
-                                    compress_lead_attachment(l)
-                            except Exception as e:
-                                logger.warning("Фоновая компрессия видео (lead %s): %s", lid, e)
-                        _bg_executor.submit(_compress_video_bg)
-                    else:
-                        compress_lead_attachment(lead)
+                    compress_lead_attachment_in_background(lead)
                     messages.success(request, "Лид сохранён. Можете добавить ещё один.")
                     form = LeadReportForm()
                 except (OperationalError, ProgrammingError) as e:
@@ -1487,7 +1506,7 @@ def leads_report_placeholder(request: HttpRequest) -> HttpResponse:
     example_video_description = "Пример идеального видео-отчёта"
     try:
         from .models import SiteSettings
-        site_settings = SiteSettings.get_settings()
+        site_settings = SiteSettings.get_cached_settings()
         if site_settings.example_video:
             example_video_url = site_settings.example_video.url
         example_video_description = site_settings.example_video_description or example_video_description
@@ -1573,7 +1592,8 @@ def lead_redo(request: HttpRequest, lead_id: int) -> HttpResponse:
                 )
             else:
                 new_contact = form.cleaned_data["raw_contact"].strip()
-                if _lead_exists_globally(new_contact, exclude_lead_id=lead.id):
+                normalized = normalize_lead_contact(new_contact)
+                if _lead_exists_globally(new_contact, exclude_lead_id=lead.id, normalized=normalized):
                     messages.error(
                         request,
                         "Такой контакт уже есть в базе отчётов (в том числе на другой платформе). Укажите другой контакт.",
@@ -1582,7 +1602,7 @@ def lead_redo(request: HttpRequest, lead_id: int) -> HttpResponse:
                     try:
                         lead.raw_contact = new_contact
                         lead.source = lead.raw_contact or ""
-                        lead.normalized_contact = normalize_lead_contact(lead.raw_contact)
+                        lead.normalized_contact = normalized
                         lead.comment = form.cleaned_data.get("comment") or ""
                         lead.lead_date = form.cleaned_data["lead_date"]
                         update_fields = ["raw_contact", "source", "normalized_contact", "comment", "lead_date", "status", "rework_comment", "updated_at"]
@@ -1596,19 +1616,10 @@ def lead_redo(request: HttpRequest, lead_id: int) -> HttpResponse:
                         lead.status = Lead.Status.PENDING
                         lead.rework_comment = ""
                         lead.save(update_fields=update_fields)
-                        ext = _get_attachment_extension(lead.attachment) if lead.attachment else None
-                        if ext in LEAD_VIDEO_EXTENSIONS:
-                            lead_id = lead.id
-                            def _compress_rework_bg(lid=lead_id):
-                                try:
-                                    l = Lead.objects.filter(pk=lid).select_related().first()
-                                    if l and l.attachment:
-                                        compress_lead_attachment(l)
-                                except Exception as e:
-                                    logger.warning("Фоновая компрессия видео (rework lead %s): %s", lid, e)
-                            _bg_executor.submit(_compress_rework_bg)
-                        elif lead.attachment:
-                            compress_lead_attachment(lead)
+                        # Сжимаем только новое вложение: старое уже сжато при первой
+                        # отправке, повторное сжатие лишь перезаписывает файл (и портит JPEG)
+                        if "attachment" in update_fields:
+                            compress_lead_attachment_in_background(lead)
                         messages.success(request, "Лид отправлен на повторную проверку.")
                         return redirect("leads_my_list")
                     except RuntimeError as e:
@@ -1660,24 +1671,22 @@ def leads_stats_placeholder(request: HttpRequest) -> HttpResponse:
     today_start, today_end = day_bounds(from_day)
     yesterday_start, yesterday_end = day_bounds(from_day - timedelta(days=1))
 
-    _exclude_dozhim = Q(lead_type__slug="dozhim")
-    today_count = (
-        Lead.objects.filter(
-            user=user,
-            status=Lead.Status.APPROVED,
-            created_at__gte=today_start,
-            created_at__lt=today_end,
-        ).exclude(_exclude_dozhim).count()
+    # Сегодня/вчера/всего — условными Count за один проход по approved-строкам
+    window_counts = dict(
+        today=Count("id", filter=Q(created_at__gte=today_start, created_at__lt=today_end)),
+        yesterday=Count("id", filter=Q(created_at__gte=yesterday_start, created_at__lt=yesterday_end)),
+        total=Count("id"),
     )
-    yesterday_count = (
-        Lead.objects.filter(
-            user=user,
-            status=Lead.Status.APPROVED,
-            created_at__gte=yesterday_start,
-            created_at__lt=yesterday_end,
-        ).exclude(_exclude_dozhim).count()
+
+    _exclude_dozhim = Q(lead_type__slug="dozhim")
+    lead_agg = (
+        Lead.objects.filter(user=user, status=Lead.Status.APPROVED)
+        .exclude(_exclude_dozhim)
+        .aggregate(**window_counts)
     )
-    total_count = Lead.objects.filter(user=user, status=Lead.Status.APPROVED).exclude(_exclude_dozhim).count()
+    today_count = lead_agg["today"]
+    yesterday_count = lead_agg["yesterday"]
+    total_count = lead_agg["total"]
 
     # ── Разбивка по типам отчётов (approved) ────────────────────────────
     from .models import (
@@ -1686,12 +1695,8 @@ def leads_stats_placeholder(request: HttpRequest) -> HttpResponse:
     )
 
     def _bucket(qs, status_field, status_approved):
-        q_appr = qs.filter(**{status_field: status_approved})
-        return (
-            q_appr.filter(created_at__gte=today_start, created_at__lt=today_end).count(),
-            q_appr.filter(created_at__gte=yesterday_start, created_at__lt=yesterday_end).count(),
-            q_appr.count(),
-        )
+        agg = qs.filter(**{status_field: status_approved}).aggregate(**window_counts)
+        return agg["today"], agg["yesterday"], agg["total"]
 
     lead_dozhim_qs = Lead.objects.filter(user=user, lead_type__slug="dozhim")
     sr_qs = SearchReport.objects.filter(user=user)
@@ -1931,8 +1936,10 @@ def dozhim_contacts(request: HttpRequest) -> HttpResponse:
                 if selected_type_id:
                     available = available.filter(lead_type_id=selected_type_id)
                 leads_to_issue = list(available[:give_count])
-                for lead in leads_to_issue:
-                    DozhimIssuedLead.objects.create(user=user, lead=lead)
+                # Одна вставка на всю пачку вместо INSERT на каждый лид
+                DozhimIssuedLead.objects.bulk_create(
+                    [DozhimIssuedLead(user=user, lead=lead) for lead in leads_to_issue]
+                )
                 allocated = leads_to_issue
 
             if allocated:
@@ -1974,7 +1981,8 @@ def dozhim_leads_report(request: HttpRequest) -> HttpResponse:
         form = DozhimLeadReportForm(request.POST, request.FILES)
         if form.is_valid():
             raw = form.cleaned_data.get("raw_contact") or ""
-            if _dozhim_lead_exists(raw):
+            normalized = normalize_lead_contact(raw)
+            if _dozhim_lead_exists(raw, normalized=normalized):
                 messages.error(
                     request,
                     "Такой контакт уже есть в отчётах дожима. Дубликаты не принимаются.",
@@ -1985,24 +1993,12 @@ def dozhim_leads_report(request: HttpRequest) -> HttpResponse:
                     lead.user = user
                     lead.raw_contact = raw.strip()
                     lead.source = raw.strip()
-                    lead.normalized_contact = normalize_lead_contact(raw)
+                    lead.normalized_contact = normalized
                     lead.lead_type = LeadType.objects.get(slug="dozhim")
-                    lead.base_type = determine_base_type_for_contact(raw, user)
+                    lead.base_type = determine_base_type_for_contact(raw, user, normalized)
                     # needs_team_contact берётся из формы
                     lead.save()
-                    ext = _get_attachment_extension(lead.attachment)
-                    if ext in LEAD_VIDEO_EXTENSIONS:
-                        lead_id = lead.id
-                        def _compress_bg(lid=lead_id):
-                            try:
-                                l = Lead.objects.filter(pk=lid).first()
-                                if l and l.attachment:
-                                    compress_lead_attachment(l)
-                            except Exception as e:
-                                logger.warning("Компрессия видео (dozhim lead %s): %s", lid, e)
-                        _bg_executor.submit(_compress_bg)
-                    else:
-                        compress_lead_attachment(lead)
+                    compress_lead_attachment_in_background(lead)
                     messages.success(request, "Отчёт (дожим) отправлен на проверку.")
                     form = DozhimLeadReportForm()
                 except Exception as e:
@@ -2058,20 +2054,17 @@ def dozhim_leads_stats(request: HttpRequest) -> HttpResponse:
     today_start, today_end = day_bounds(from_day)
     yesterday_start, yesterday_end = day_bounds(from_day - timedelta(days=1))
 
-    today_count = Lead.objects.filter(
-        _dz, user=user, status=Lead.Status.APPROVED,
-        created_at__gte=today_start, created_at__lt=today_end,
-    ).count()
-    yesterday_count = Lead.objects.filter(
-        _dz, user=user, status=Lead.Status.APPROVED,
-        created_at__gte=yesterday_start, created_at__lt=yesterday_end,
-    ).count()
-    total_count = Lead.objects.filter(_dz, user=user, status=Lead.Status.APPROVED).count()
+    # Сегодня/вчера/всего — один проход по одобренным дожим-лидам (условные Count)
+    counts = Lead.objects.filter(_dz, user=user, status=Lead.Status.APPROVED).aggregate(
+        today=Count("id", filter=Q(created_at__gte=today_start, created_at__lt=today_end)),
+        yesterday=Count("id", filter=Q(created_at__gte=yesterday_start, created_at__lt=yesterday_end)),
+        total=Count("id"),
+    )
 
     return render(request, "core/dozhim_leads_stats.html", {
-        "today_count": today_count,
-        "yesterday_count": yesterday_count,
-        "total_count": total_count,
+        "today_count": counts["today"],
+        "yesterday_count": counts["yesterday"],
+        "total_count": counts["total"],
         "dozhim_reward": getattr(settings, "DOZHIM_APPROVE_REWARD", 40),
     })
 
@@ -2089,30 +2082,20 @@ def dozhim_lead_redo(request: HttpRequest, lead_id: int) -> HttpResponse:
         form = DozhimLeadReportForm(request.POST, request.FILES, instance=lead)
         if form.is_valid():
             raw = form.cleaned_data.get("raw_contact") or ""
-            if _dozhim_lead_exists(raw, exclude_lead_id=lead.pk):
+            normalized = normalize_lead_contact(raw)
+            if _dozhim_lead_exists(raw, exclude_lead_id=lead.pk, normalized=normalized):
                 messages.error(request, "Такой контакт уже есть в отчётах дожима. Дубликаты не принимаются.")
             else:
                 lead = form.save(commit=False)
                 lead.raw_contact = raw.strip()
                 lead.source = raw.strip()
-                lead.normalized_contact = normalize_lead_contact(raw)
+                lead.normalized_contact = normalized
                 lead.status = Lead.Status.PENDING
                 lead.rejection_reason = ""
                 lead.save()
-                if lead.attachment:
-                    ext = _get_attachment_extension(lead.attachment)
-                    if ext in LEAD_VIDEO_EXTENSIONS:
-                        lid = lead.id
-                        def _compress_redo_bg(lid=lid):
-                            try:
-                                l = Lead.objects.filter(pk=lid).first()
-                                if l and l.attachment:
-                                    compress_lead_attachment(l)
-                            except Exception as e:
-                                logger.warning("Компрессия видео (dozhim redo %s): %s", lid, e)
-                        _bg_executor.submit(_compress_redo_bg)
-                    else:
-                        compress_lead_attachment(lead)
+                # Сжимаем только новое вложение (старое уже сжато при первой отправке)
+                if lead.attachment and "attachment" in request.FILES:
+                    compress_lead_attachment_in_background(lead)
                 messages.success(request, "Отчёт отправлен на повторную проверку.")
                 return redirect("dozhim_leads_my_list")
     else:
@@ -2130,19 +2113,15 @@ def dozhim_download_txt(request: HttpRequest) -> HttpResponse:
         return redirect("dashboard")
 
 
-    issued = (
+    # Нужен только raw_contact лида — одна колонка через JOIN, без моделей;
+    # строки склеиваются генератором, без промежуточного списка
+    raw_contacts = (
         DozhimIssuedLead.objects.filter(user=user)
-        .select_related("lead", "lead__lead_type")
         .order_by("-created_at")
+        .values_list("lead__raw_contact", flat=True)
     )
-
-    lines = []
-    for item in issued:
-        raw = item.lead.raw_contact or ""
-        if raw.strip():
-            lines.append(raw.strip())
-
-    content = "\n".join(lines)
+    stripped = ((raw or "").strip() for raw in raw_contacts)
+    content = "\n".join(raw for raw in stripped if raw)
     response = HttpResponse(content, content_type="text/plain; charset=utf-8")
     response["Content-Disposition"] = 'attachment; filename="dozhim_contacts.txt"'
     return response
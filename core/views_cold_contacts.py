@@ -14,7 +14,7 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
 from django.contrib import messages
@@ -27,13 +27,17 @@ from django.utils import timezone
 
 from .models import CallAttempt, CallReport, ColdContact
 from .services.windowgram_api import (
-    WindowgramError, create_chat, format_chat_title, send_summary, validate_chat,
+    WindowgramError, create_chat, format_chat_title, send_summary_background, validate_chat,
 )
 
 
 MSK = ZoneInfo("Europe/Moscow")
+# Ссылочные префиксы перед TG-ником (сравниваются с вводом в нижнем регистре)
+_TG_LINK_PREFIXES = ("https://t.me/", "http://t.me/", "t.me/", "telegram.me/")
 
 ALLOWED_ROLES = ("user", "worker")
+# Допустимые статусы попытки прозвона (проверка ввода формы)
+_CALL_ATTEMPT_STATUSES = frozenset(s.value for s in CallAttempt.Status)
 
 
 def _is_minion(user) -> bool:
@@ -53,15 +57,15 @@ def _is_minion(user) -> bool:
 
 def _recompute_final_status(contact: ColdContact) -> None:
     """Пересчитать final_status на основе попыток. Сохраняет contact."""
-    attempts = list(contact.attempts.all())
-    statuses = [a.status for a in attempts]
+    # Нужны только статусы попыток — без создания моделей CallAttempt
+    statuses = list(contact.attempts.values_list("status", flat=True))
 
     # Приоритет: lead > refused > no_answer > in_progress
     if CallAttempt.Status.LEAD in statuses:
         contact.final_status = ColdContact.FinalStatus.LEAD
     elif CallAttempt.Status.REFUSED in statuses:
         contact.final_status = ColdContact.FinalStatus.REFUSED
-    elif len(attempts) >= 3 and all(s == CallAttempt.Status.NDZ for s in statuses):
+    elif len(statuses) >= 3 and all(s == CallAttempt.Status.NDZ for s in statuses):
         contact.final_status = ColdContact.FinalStatus.NO_ANSWER
     else:
         contact.final_status = ColdContact.FinalStatus.IN_PROGRESS
@@ -154,8 +158,7 @@ def contact_attempt_update(request: HttpRequest, contact_id: int, n: int) -> Htt
 
     contact = get_object_or_404(ColdContact, pk=contact_id, owner=request.user)
     status = (request.POST.get("status") or "").strip()
-    valid_statuses = {s.value for s in CallAttempt.Status}
-    if status not in valid_statuses:
+    if status not in _CALL_ATTEMPT_STATUSES:
         # Пустая строка → удалить попытку (если есть)
         CallAttempt.objects.filter(contact=contact, attempt_no=n).delete()
         _recompute_final_status(contact)
@@ -196,8 +199,9 @@ def contact_mark_lead(request: HttpRequest, contact_id: int) -> HttpResponse:
     name = (request.POST.get("name") or "").strip()[:255]
     tg_username = (request.POST.get("tg_username") or "").strip()[:100]
     # Чистим обвязки t.me/, @ — оставляем только сам username
-    for p in ("https://t.me/", "http://t.me/", "t.me/", "telegram.me/"):
-        if tg_username.lower().startswith(p):
+    tg_lower = tg_username.lower()
+    for p in _TG_LINK_PREFIXES:
+        if tg_lower.startswith(p):
             tg_username = tg_username[len(p):]
             break
     tg_username = tg_username.lstrip("@").strip().rstrip("/")
@@ -222,7 +226,7 @@ def contact_mark_lead(request: HttpRequest, contact_id: int) -> HttpResponse:
     call_time = None
     if raw_date:
         try:
-            call_date = datetime.strptime(raw_date, "%Y-%m-%d").date()
+            call_date = date.fromisoformat(raw_date)
         except ValueError:
             pass
     if raw_time:
@@ -256,10 +260,10 @@ def contact_mark_lead(request: HttpRequest, contact_id: int) -> HttpResponse:
             contact.chat_invite_link = chat_data.get("invite_link") or ""
             contact.chat_created_at = timezone.now()
             contact.save(update_fields=["chat_id", "chat_invite_link", "chat_created_at", "updated_at"])
-            # Шлём в чат сводку (Номер / Дата / Время)
+            # Шлём в чат сводку (Номер / Дата / Время) — в фоне, не задерживая ответ
             date_str = call_date.strftime("%d.%m") if call_date else ""
             time_str = call_time.strftime("%H:%M") if call_time else ""
-            send_summary(
+            send_summary_background(
                 contact.chat_id, contact.contact, date_str, time_str,
             )
             messages.success(request, f"Лид зафиксирован, чат «{title}» создан.")
@@ -299,7 +303,7 @@ def contact_create_chat(request: HttpRequest, contact_id: int) -> HttpResponse:
         contact.save(update_fields=["chat_id", "chat_invite_link", "chat_created_at", "updated_at"])
         date_str = contact.lead_call_date.strftime("%d.%m") if contact.lead_call_date else ""
         time_str = contact.lead_call_time.strftime("%H:%M") if contact.lead_call_time else ""
-        send_summary(contact.chat_id, contact.contact, date_str, time_str)
+        send_summary_background(contact.chat_id, contact.contact, date_str, time_str)
         messages.success(request, f"Чат «{title}» создан.")
     except WindowgramError as exc:
         messages.error(request, f"Не удалось создать чат: {exc}")
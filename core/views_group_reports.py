@@ -112,6 +112,26 @@ def _windowgram_revoke_subadmin(
         return False, str(exc)
 
 
+def _windowgram_sync_errors(calls: list[tuple[str, object, dict]]) -> list[str]:
+    """Выполняет sync-вызовы бот-сервера (label, функция, kwargs) и возвращает
+    ошибки вида «TG: ...» в исходном порядке.
+
+    TG- и VK-записи независимы: два HTTPS-запроса идут параллельно, и
+    ожидание равно самому долгому из них, а не сумме."""
+    if len(calls) <= 1:
+        results = [fn(**kwargs) for _label, fn, kwargs in calls]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+            futures = [pool.submit(fn, **kwargs) for _label, fn, kwargs in calls]
+            results = [f.result() for f in futures]
+    return [
+        f"{label}: {note}"
+        for (label, _fn, _kwargs), (ok, note) in zip(calls, results)
+        if not ok
+    ]
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # Гарды доступа
 # ════════════════════════════════════════════════════════════════════════════
@@ -157,6 +177,7 @@ def _is_manager_with_right(user) -> bool:
 _VK_ID_RE = re.compile(r"vk\.com/id(\d+)", re.IGNORECASE)
 _VK_SCREEN_RE = re.compile(r"vk\.com/([a-zA-Z0-9_.]+)", re.IGNORECASE)
 _DIGITS_RE = re.compile(r"^\s*(\d+)\s*$")
+_USERNAME_RE = re.compile(r"^[a-zA-Z0-9_.]+$")
 
 
 def _parse_link(text: str) -> tuple[int | None, str | None]:
@@ -194,8 +215,9 @@ def _parse_link(text: str) -> tuple[int | None, str | None]:
         return None, s[1:].lower().strip()
 
     # t.me/username или t.me/+invite — берём первый сегмент
-    if "t.me/" in s.lower():
-        rest = s.lower().split("t.me/", 1)[1].split("?")[0].split("/")[0]
+    s_lower = s.lower()
+    if "t.me/" in s_lower:
+        rest = s_lower.partition("t.me/")[2].partition("?")[0].partition("/")[0]
         if rest and not rest.startswith("+"):
             return None, rest
 
@@ -207,7 +229,7 @@ def _parse_link(text: str) -> tuple[int | None, str | None]:
             return None, rest.lower()
 
     # просто слово — считаем username'ом
-    if re.match(r"^[a-zA-Z0-9_.]+$", s):
+    if _USERNAME_RE.match(s):
         return None, s.lower()
 
     return None, None
@@ -534,21 +556,18 @@ def admin_group_report_grant(request: HttpRequest, user_id: int) -> HttpResponse
 
     # Регистрируем на бот-сервере — отдельная запись на каждую платформу.
     # Если хоть один sync упал — право не выдаём, чтобы не было рассинхрона.
-    errors: list[str] = []
+    calls = []
     if tg_username:
-        ok, note = _windowgram_register_subadmin(
+        calls.append(("TG", _windowgram_register_subadmin, dict(
             platform="telegram", platform_user_id=None,
             username=tg_username, display_name=display_name,
-        )
-        if not ok:
-            errors.append(f"TG: {note}")
+        )))
     if vk_screen:
-        ok, note = _windowgram_register_subadmin(
+        calls.append(("VK", _windowgram_register_subadmin, dict(
             platform="vk", platform_user_id=None,
             username=vk_screen, display_name=display_name,
-        )
-        if not ok:
-            errors.append(f"VK: {note}")
+        )))
+    errors = _windowgram_sync_errors(calls)
 
     if errors:
         messages.error(
@@ -591,21 +610,18 @@ def admin_group_report_revoke(request: HttpRequest, user_id: int) -> HttpRespons
     # Soft-fail — если бот недоступен, в нашей БД право снимем всё равно.
     # NB: это право общее с «Прозвонами» (cold-contacts) — отзыв снимет
     # доступ и к нему тоже.
-    bot_errors: list[str] = []
+    calls = []
     if target.bot_admin_tg_username:
-        ok, note = _windowgram_revoke_subadmin(
+        calls.append(("TG", _windowgram_revoke_subadmin, dict(
             platform="telegram", platform_user_id=None,
             username=target.bot_admin_tg_username,
-        )
-        if not ok:
-            bot_errors.append(f"TG: {note}")
+        )))
     if target.bot_admin_vk_screen_name:
-        ok, note = _windowgram_revoke_subadmin(
+        calls.append(("VK", _windowgram_revoke_subadmin, dict(
             platform="vk", platform_user_id=None,
             username=target.bot_admin_vk_screen_name,
-        )
-        if not ok:
-            bot_errors.append(f"VK: {note}")
+        )))
+    bot_errors = _windowgram_sync_errors(calls)
     if bot_errors:
         messages.warning(
             request,
@@ -1084,11 +1100,12 @@ def _bookings_by_minute_window(start: date, end: date) -> dict[date, dict[int, i
     try:
         with connections["windowgram"].cursor() as cur:
             cur.execute(sql, [start, end])
-            for ev_date, ev_time, user_name in cur.fetchall():
+            # Один проход — читаем курсор построчно, без списка всех событий
+            for ev_date, ev_time, user_name in cur:
                 if not ev_time:
                     continue
                 name = (user_name or "").strip()
-                if any(name.startswith(p) for p in NON_BOOKING_PREFIXES):
+                if name.startswith(NON_BOOKING_PREFIXES):
                     continue
                 parts = ev_time.replace(".", ":").split(":")
                 if len(parts) != 2:
@@ -1,5 +1,6 @@
 """Вьюхи для партнёрского кабинета."""
 import logging
+import re
 from functools import wraps
 from uuid import uuid4
 
@@ -22,6 +23,9 @@ logger = logging.getLogger(__name__)
 
 PARTNER_EARN_PER_LEAD_DEFAULT = 10  # руб. за каждый одобренный лид (по умолчанию)
 
+# reason начисления рефоводу: sozvon_ref#<link_id> / deal_ref#<link_id>
+_REF_REASON_RE = re.compile(r"(sozvon_ref|deal_ref)#(\d+)")
+
 
 def dozhim_required(view_func):
     """Гард: партнёрские дожим-вьюхи доступны только при DOZHIM_ENABLED=true.
@@ -102,7 +106,6 @@ def _referral_earnings_breakdown(partner_user) -> dict[int, dict]:
     Возвращает `{referral_user_id: {sozvon_cnt, sozvon_amt, deal_cnt,
     deal_amt, total}}`.
     """
-    import re
     from django.db.models import Q
     from .models import BalanceLog, SearchLink
     out: dict[int, dict] = {}
@@ -125,7 +128,7 @@ def _referral_earnings_breakdown(partner_user) -> dict[int, dict]:
     parsed: list[tuple[str, int, int]] = []
     link_ids: set[int] = set()
     for reason, delta in logs:
-        m = re.match(r"(sozvon_ref|deal_ref)#(\d+)", reason or "")
+        m = _REF_REASON_RE.match(reason or "")
         if not m:
             continue
         lid = int(m.group(2))
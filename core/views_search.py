@@ -325,7 +325,7 @@ def search_report_create(request: HttpRequest, code: str) -> HttpResponse:
                 return render(request, "search/report_form.html", {"link": link})
 
         # Нормализуем контакт для дедупликации (единый формат для phone/bot_start).
-        from .lead_utils import normalize_lead_contact, compress_lead_attachment
+        from .lead_utils import normalize_lead_contact, compress_lead_attachment_in_background
         normalized = normalize_lead_contact(client_phone if is_phone else raw_contact)
 
         report = SearchReport.objects.create(
@@ -346,7 +346,7 @@ def search_report_create(request: HttpRequest, code: str) -> HttpResponse:
                 else SearchReport.Status.PENDING
             ),
         )
-        compress_lead_attachment(report)
+        compress_lead_attachment_in_background(report)
 
         # Дубликат по реальному идентификатору клиента (telegram_id / vk_id /
         # username из бота, либо client_phone для phone_callback) — НЕ по
@@ -531,8 +531,8 @@ def search_report_redo(request: HttpRequest, code: str) -> HttpResponse:
 
         report.save(update_fields=list(set(update_fields)))
         if attachment:
-            from .lead_utils import compress_lead_attachment
-            compress_lead_attachment(report)
+            from .lead_utils import compress_lead_attachment_in_background
+            compress_lead_attachment_in_background(report)
 
         # Ручная привязка идентификатора — записываем прямо в SearchLink.
         if manual_parsed:
@@ -654,6 +654,7 @@ def _find_duplicate_search_report(*, exclude_report_id, link, client_phone=""):
 _MANUAL_CLAIM_VK_ID_RE = re.compile(r"vk\.(?:com|ru)/id(\d+)", re.IGNORECASE)
 _MANUAL_CLAIM_VK_NAME_RE = re.compile(r"vk\.(?:com|ru)/([a-z0-9_.]+)", re.IGNORECASE)
 _MANUAL_CLAIM_TME_RE = re.compile(r"t(?:elegram)?\.(?:me|dog)/([a-zA-Z0-9_+]+)", re.IGNORECASE)
+_MANUAL_CLAIM_USERNAME_RE = re.compile(r"^[a-zA-Z0-9_]{3,}$")
 
 
 def _looks_like_phone_number(digits: str) -> bool:
@@ -718,7 +719,7 @@ def parse_manual_client_input(raw: str) -> dict:
         if _looks_like_phone_number(s_stripped):
             return {}
         return {"platform": "telegram", "telegram_id": int(s_stripped)}
-    if re.match(r"^[a-zA-Z0-9_]{3,}$", s_stripped):
+    if _MANUAL_CLAIM_USERNAME_RE.match(s_stripped):
         return {"platform": "telegram", "telegram_username": s_stripped.lower()}
     return {}
 
@@ -1253,7 +1254,7 @@ def _autoadd_lead_contact(link: SearchLink, platform: str) -> None:
     Идемпотентно по (base_type, value) — если контакт уже есть, не создаём дубль и
     не перепривязываем к другому менеджеру.
     """
-    from .models import BaseType, Contact
+    from .models import Contact
 
     if platform == "telegram":
         slug = "telegram"
@@ -1272,7 +1273,8 @@ def _autoadd_lead_contact(link: SearchLink, platform: str) -> None:
         else:
             return
 
-    base_type = BaseType.objects.filter(slug=slug).first()
+    from .lead_utils import get_base_type_by_slug
+    base_type = get_base_type_by_slug(slug)
     if not base_type:
         logger.warning("SearchLink autoadd: base_type %s not found", slug)
         return
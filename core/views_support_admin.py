@@ -1,8 +1,8 @@
 import os
 import threading
+import time as time_module
 import uuid
 from datetime import date, datetime, time, timedelta, timezone as dt_utc
-from io import BytesIO
 from zoneinfo import ZoneInfo
 
 from django.conf import settings
@@ -21,7 +21,7 @@ from django.views.decorators.http import require_http_methods
 from openpyxl import Workbook, load_workbook
 
 from .forms import BaseCategoryUploadForm, BaseExcelUploadForm, LeadRejectForm, LeadReworkForm, LeadsExcelUploadForm
-from .lead_utils import normalize_lead_contact
+from .lead_utils import get_base_type_by_slug, normalize_lead_contact
 from .models import (
     BaseType,
     BasesImportJob,
@@ -418,6 +418,62 @@ def _day_bounds_lead_stats():
     return today_start, today_end, yesterday_start, yesterday_end
 
 
+# Строки статистики отчётов пользователя: (подпись, модель, поле владельца).
+# Статичная таблица — на запросе остаются только счётчики.
+_USER_REPORT_STATS_TYPES = (
+    ("Lead (поиск+дожим)", "Lead", "user"),
+    ("🔗 SearchLink", "SearchReport", "user"),
+    ("📊 Группы", "GroupReport", "user"),
+    ("🔍 Не в боте", "ManualSearchClaim", "user"),
+    ("📞 Прозвон", "CallReport", "cold_contact__owner"),
+    # Воркерские — через worker_id
+    ("WSL (СС-самост.)", "WorkerSelfLead", "worker"),
+    ("WR (СС-задания)", "WorkerReport", "worker"),
+)
+
+
+# Кэш счётчиков по пользователю: (user_id, начало «дня») -> (expires_at, stats_by_type).
+# Начало дня в ключе — после смены дня в 20:00 старые записи просто не находятся.
+_USER_REPORT_STATS_CACHE: dict = {}
+USER_REPORT_STATS_CACHE_SECONDS = 60
+USER_REPORT_STATS_CACHE_MAX_ITEMS = 1024
+
+
+def _get_user_report_stats(user_id: int) -> list[dict]:
+    """Approved за сегодня/вчера/всего по типам отчётов пользователя (с кэшем на 60 сек)."""
+    today_start, today_end, yesterday_start, yesterday_end = _day_bounds_lead_stats()
+    key = (user_id, today_start)
+    now = time_module.time()
+    cached = _USER_REPORT_STATS_CACHE.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    from . import models as core_models
+
+    stats_by_type = []
+    for label, model_name, owner_lookup in _USER_REPORT_STATS_TYPES:
+        model = getattr(core_models, model_name)
+        # Один aggregate с условными Count вместо трёх COUNT-запросов
+        c = model.objects.filter(**{owner_lookup: user_id}, status="approved").aggregate(
+            today=Count("id", filter=Q(created_at__gte=today_start, created_at__lt=today_end)),
+            yesterday=Count("id", filter=Q(created_at__gte=yesterday_start, created_at__lt=yesterday_end)),
+            total=Count("id"),
+        )
+        stats_by_type.append({"label": label, **c})
+
+    if key not in _USER_REPORT_STATS_CACHE and len(_USER_REPORT_STATS_CACHE) >= USER_REPORT_STATS_CACHE_MAX_ITEMS:
+        # Вытесняем самую старую запись (dict хранит порядок вставки)
+        _USER_REPORT_STATS_CACHE.pop(next(iter(_USER_REPORT_STATS_CACHE)), None)
+    _USER_REPORT_STATS_CACHE[key] = (now + USER_REPORT_STATS_CACHE_SECONDS, stats_by_type)
+    return stats_by_type
+
+
+def clear_user_report_stats_cache(user_id: int) -> None:
+    """Сбросить кэш счётчиков пользователя (после смены статуса его отчёта)."""
+    for key in [k for k in _USER_REPORT_STATS_CACHE if k[0] == user_id]:
+        _USER_REPORT_STATS_CACHE.pop(key, None)
+
+
 @login_required
 def admin_user_lead_stats(request: HttpRequest, user_id: int) -> HttpResponse:
     """Статистика отчётов по выбранному пользователю (для админа).
@@ -429,58 +485,12 @@ def admin_user_lead_stats(request: HttpRequest, user_id: int) -> HttpResponse:
     if not _require_support(request):
         return HttpResponseForbidden("Недостаточно прав.")
     target_user = get_object_or_404(User, pk=user_id)
-    today_start, today_end, yesterday_start, yesterday_end = _day_bounds_lead_stats()
 
-    from .models import (
-        SearchReport, GroupReport, ManualSearchClaim,
-        WorkerSelfLead, WorkerReport, CallReport,
-    )
-
-    def _counts(qs, status_attr_name, status_approved):
-        """Возвращает (today, yesterday, total) approved по qs.
-        Использует created_at + поле статуса с заданным значением."""
-        approved_qs = qs.filter(**{status_attr_name: status_approved})
-        return (
-            approved_qs.filter(
-                created_at__gte=today_start, created_at__lt=today_end,
-            ).count(),
-            approved_qs.filter(
-                created_at__gte=yesterday_start, created_at__lt=yesterday_end,
-            ).count(),
-            approved_qs.count(),
-        )
-
-    # Базовые qs по user_id (для большинства моделей)
-    base_lead = Lead.objects.filter(user=target_user)
-    base_sr = SearchReport.objects.filter(user=target_user)
-    base_gr = GroupReport.objects.filter(user=target_user)
-    base_msc = ManualSearchClaim.objects.filter(user=target_user)
-    base_cr = CallReport.objects.filter(cold_contact__owner=target_user)
-    # Воркерские — через worker_id
-    base_wsl = WorkerSelfLead.objects.filter(worker=target_user)
-    base_wr = WorkerReport.objects.filter(worker=target_user)
-
-    lead_t, lead_y, lead_tot = _counts(base_lead, "status", Lead.Status.APPROVED)
-    sr_t, sr_y, sr_tot = _counts(base_sr, "status", SearchReport.Status.APPROVED)
-    gr_t, gr_y, gr_tot = _counts(base_gr, "status", GroupReport.Status.APPROVED)
-    msc_t, msc_y, msc_tot = _counts(base_msc, "status", ManualSearchClaim.Status.APPROVED)
-    cr_t, cr_y, cr_tot = _counts(base_cr, "status", CallReport.Status.APPROVED)
-    wsl_t, wsl_y, wsl_tot = _counts(base_wsl, "status", WorkerSelfLead.Status.APPROVED)
-    wr_t, wr_y, wr_tot = _counts(base_wr, "status", "approved")
-
-    stats_by_type = [
-        {"label": "Lead (поиск+дожим)", "today": lead_t, "yesterday": lead_y, "total": lead_tot},
-        {"label": "🔗 SearchLink", "today": sr_t, "yesterday": sr_y, "total": sr_tot},
-        {"label": "📊 Группы", "today": gr_t, "yesterday": gr_y, "total": gr_tot},
-        {"label": "🔍 Не в боте", "today": msc_t, "yesterday": msc_y, "total": msc_tot},
-        {"label": "📞 Прозвон", "today": cr_t, "yesterday": cr_y, "total": cr_tot},
-        {"label": "WSL (СС-самост.)", "today": wsl_t, "yesterday": wsl_y, "total": wsl_tot},
-        {"label": "WR (СС-задания)", "today": wr_t, "yesterday": wr_y, "total": wr_tot},
-    ]
+    stats_by_type = _get_user_report_stats(target_user.pk)
     # Итог по всем типам
-    today_count = lead_t + sr_t + gr_t + msc_t + cr_t + wsl_t + wr_t
-    yesterday_count = lead_y + sr_y + gr_y + msc_y + cr_y + wsl_y + wr_y
-    total_count = lead_tot + sr_tot + gr_tot + msc_tot + cr_tot + wsl_tot + wr_tot
+    today_count = sum(s["today"] for s in stats_by_type)
+    yesterday_count = sum(s["yesterday"] for s in stats_by_type)
+    total_count = sum(s["total"] for s in stats_by_type)
 
     return render(
         request,
@@ -679,7 +689,7 @@ def admin_leads_all_new(request: HttpRequest) -> HttpResponse:
                     time_filt = None
                     try:
                         if len(word) == 10 and word[4] == "-" and word[7] == "-":  # YYYY-MM-DD
-                            date_filt = datetime.strptime(word, "%Y-%m-%d").date()
+                            date_filt = date.fromisoformat(word)
                         elif len(word) == 10 and word[2] == "." and word[5] == ".":  # DD.MM.YYYY
                             date_filt = datetime.strptime(word, "%d.%m.%Y").date()
                         elif len(word) == 5 and word[2] == ".":  # DD.MM
@@ -802,6 +812,7 @@ def admin_lead_approve(request: HttpRequest, user_id: int, lead_id: int) -> Http
         lead.reviewed_at = timezone.now()
         lead.reviewed_by = request.user
         lead.save(update_fields=["status", "rejection_reason", "rework_comment", "reviewed_at", "reviewed_by"])
+        clear_user_report_stats_cache(lead.user_id)
         # Динамическая награда: дожим → 30р, поиск → 40р
         is_dozhim = lead.lead_type and lead.lead_type.slug == "dozhim"
         reward = getattr(settings, "DOZHIM_APPROVE_REWARD", 40) if is_dozhim else LEAD_APPROVE_REWARD
@@ -912,6 +923,7 @@ def admin_lead_reject(request: HttpRequest, user_id: int, lead_id: int) -> HttpR
                 lead_refresh.reviewed_at = timezone.now()
                 lead_refresh.reviewed_by = request.user
                 lead_refresh.save(update_fields=["status", "rejection_reason", "rework_comment", "reviewed_at", "reviewed_by"])
+                clear_user_report_stats_cache(lead_refresh.user_id)
                 if was_approved:
                     _is_dz = lead_refresh.lead_type and lead_refresh.lead_type.slug == "dozhim"
                     reward = getattr(settings, "DOZHIM_APPROVE_REWARD", 40) if _is_dz else getattr(settings, "LEAD_APPROVE_REWARD", 40)
@@ -986,6 +998,7 @@ def admin_lead_rework(request: HttpRequest, user_id: int, lead_id: int) -> HttpR
                 lead_refresh.reviewed_at = timezone.now()
                 lead_refresh.reviewed_by = request.user
                 lead_refresh.save(update_fields=["status", "rework_comment", "rejection_reason", "reviewed_at", "reviewed_by"])
+                clear_user_report_stats_cache(lead_refresh.user_id)
                 if was_approved:
                     _is_dz = lead_refresh.lead_type and lead_refresh.lead_type.slug == "dozhim"
                     reward = getattr(settings, "DOZHIM_APPROVE_REWARD", 40) if _is_dz else getattr(settings, "LEAD_APPROVE_REWARD", 40)
@@ -1123,7 +1136,7 @@ def admin_user_leads_export(request: HttpRequest, user_id: int, period: str) ->
     if period not in ("today", "yesterday", "all"):
         return HttpResponseForbidden("Недопустимый период.")
     target_user = get_object_or_404(User, pk=user_id)
-    leads_qs = Lead.objects.filter(user=target_user).select_related("lead_type", "base_type").order_by("-created_at")
+    leads_qs = Lead.objects.filter(user=target_user).order_by("-created_at")
     if period in ("today", "yesterday"):
         today_start, today_end, yesterday_start, yesterday_end = _day_bounds_lead_stats()
         if period == "today":
@@ -1131,10 +1144,13 @@ def admin_user_leads_export(request: HttpRequest, user_id: int, period: str) ->
         else:
             start, end = yesterday_start, yesterday_end
         leads_qs = leads_qs.filter(created_at__gte=start, created_at__lt=end)
-    leads = list(leads_qs)
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Лиды"
+    # Фильтр по пользователю/периоду — в SQL; строки читаются кортежами потоком
+    # и сразу пишутся в write_only-книгу, без списка моделей в памяти.
+    rows = leads_qs.values_list(
+        "id", "lead_type__name", "base_type__name", "raw_contact", "source", "comment", "created_at", "attachment",
+    ).iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Лиды")
     ws.append(
         [
             "ID",
@@ -1148,35 +1164,28 @@ def admin_user_leads_export(request: HttpRequest, user_id: int, period: str) ->
             "Скриншот (ссылка)",
         ]
     )
-    for lead in leads:
-        screenshot_url = ""
-        if lead.attachment:
-            screenshot_url = request.build_absolute_uri(
-                reverse("admin_lead_attachment", args=[lead.user_id, lead.id])
-            )
+    # URL скриншота и username не зависят от строки: reverse + build_absolute_uri
+    # один раз по лиду-заглушке 0, в цикле подставляется только id
+    url_head, _, url_tail = request.build_absolute_uri(
+        reverse("admin_lead_attachment", args=[target_user.pk, 0])
+    ).rpartition("/0/")
+    username = target_user.username
+    for lead_id, lead_type_name, base_type_name, raw_contact, source, comment, created_at, attachment in rows:
+        screenshot_url = f"{url_head}/{lead_id}/{url_tail}" if attachment else ""
         ws.append(
             [
-                lead.id,
-                lead.user.username,
-                lead.lead_type.name if lead.lead_type else "",
-                lead.base_type.name if lead.base_type else "",
-                lead.raw_contact,
-                lead.source,
-                lead.comment,
-                lead.created_at.isoformat(),
+                lead_id,
+                username,
+                lead_type_name or "",
+                base_type_name or "",
+                raw_contact,
+                source,
+                comment,
+                created_at.isoformat(),
                 screenshot_url,
             ]
         )
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    filename = f"leads_{target_user.username}_{period}.xlsx"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+    return _make_excel_response(wb, f"leads_{target_user.username}_{period}.xlsx")
 
 
 @login_required
@@ -1253,33 +1262,29 @@ def admin_all_users(request: HttpRequest) -> HttpResponse:
     show = request.GET.get("show", "all")
     today_start, today_end, yesterday_start, yesterday_end = _day_bounds_lead_stats()
     total_users_count = User.objects.count()
-    active_today_count = User.objects.filter(
-        leads__created_at__gte=today_start, leads__created_at__lt=today_end
-    ).distinct().count()
-    active_yesterday_count = User.objects.filter(
-        leads__created_at__gte=yesterday_start,
-        leads__created_at__lt=yesterday_end,
-    ).distinct().count()
+    # Активные за день — только колонка user_id из лидов за период, без JOIN на
+    # пользователей и DISTINCT по всем их полям
+    today_user_ids = Lead.objects.filter(
+        created_at__gte=today_start, created_at__lt=today_end
+    ).values("user_id")
+    yesterday_user_ids = Lead.objects.filter(
+        created_at__gte=yesterday_start, created_at__lt=yesterday_end
+    ).values("user_id")
+    # Оба счётчика активных — одним проходом по лидам за вчера+сегодня
+    active = Lead.objects.filter(created_at__gte=yesterday_start, created_at__lt=today_end).aggregate(
+        today=Count("user_id", distinct=True, filter=Q(created_at__gte=today_start)),
+        yesterday=Count("user_id", distinct=True, filter=Q(created_at__lt=yesterday_end)),
+    )
+    active_today_count = active["today"]
+    active_yesterday_count = active["yesterday"]
     if show == "today":
-        users_list = (
-            User.objects.filter(
-                leads__created_at__gte=today_start, leads__created_at__lt=today_end
-            )
-            .distinct()
-            .order_by("-date_joined")
-        )
+        users_list = User.objects.filter(pk__in=today_user_ids).order_by("-date_joined")
     elif show == "yesterday":
-        users_list = (
-            User.objects.filter(
-                leads__created_at__gte=yesterday_start,
-                leads__created_at__lt=yesterday_end,
-            )
-            .distinct()
-            .order_by("-date_joined")
-        )
+        users_list = User.objects.filter(pk__in=yesterday_user_ids).order_by("-date_joined")
     else:
         users_list = User.objects.all().order_by("-date_joined")
-    total_balance = (User.objects.aggregate(s=Sum("balance"))["s"] or 0) + (User.objects.aggregate(s=Sum("dozhim_balance"))["s"] or 0)
+    balances = User.objects.aggregate(b=Sum("balance"), d=Sum("dozhim_balance"))
+    total_balance = (balances["b"] or 0) + (balances["d"] or 0)
     return render(
         request,
         "core/admin_all_users.html",
@@ -1294,49 +1299,92 @@ def admin_all_users(request: HttpRequest) -> HttpResponse:
     )
 
 
-@login_required
-def admin_stats(request: HttpRequest) -> HttpResponse:
-    if not _require_support(request):
-        return HttpResponseForbidden("Недостаточно прав.")
+# Итоги по базам (total/free) — агрегат по всей таблице контактов. Кэшируем на
+# процесс, чтобы обновление страницы статистики не сканировало базы заново.
+_BASE_STATS_CACHE = {"rows": None, "cache_until": 0}
+BASE_STATS_CACHE_SECONDS = 60
+
+
+def _get_base_stats() -> list[dict]:
+    now = time_module.time()
+    if _BASE_STATS_CACHE["rows"] is None or now >= _BASE_STATS_CACHE["cache_until"]:
+        # Один запрос с аннотацией вместо 2N запросов
+        _BASE_STATS_CACHE["rows"] = [
+            {
+                "base": bt,
+                "total": bt._total,
+                "free": bt._free,
+                "issued": bt._total - bt._free,
+            }
+            for bt in BaseType.objects.annotate(
+                _total=Count("contacts"),
+                _free=Count("contacts", filter=Q(contacts__assigned_to__isnull=True, contacts__is_active=True)),
+            ).order_by("order")
+        ]
+        _BASE_STATS_CACHE["cache_until"] = now + BASE_STATS_CACHE_SECONDS
+    return _BASE_STATS_CACHE["rows"]
 
-    # Статистика по базам (один запрос с аннотацией вместо 2N запросов)
-    base_stats = [
-        {
-            "base": bt,
-            "total": bt._total,
-            "free": bt._free,
-            "issued": bt._total - bt._free,
-        }
-        for bt in BaseType.objects.annotate(
-            _total=Count("contacts"),
-            _free=Count("contacts", filter=Q(contacts__assigned_to__isnull=True, contacts__is_active=True)),
-        ).order_by("order")
-    ]
 
-    # Статистика по лидам: за неделю, месяц, всё время
+def clear_base_stats_cache() -> None:
+    """Сбросить кэш итогов по базам (после загрузки контактов)."""
+    _BASE_STATS_CACHE["cache_until"] = 0
+
+
+# Одобренные лиды по типам за неделю/месяц/всё время — GROUP BY по всей таблице
+# лидов; на странице статистики минутная задержка цифр допустима.
+_LEAD_STATS_CACHE = {"counts": None, "cache_until": 0}
+LEAD_STATS_CACHE_SECONDS = 60
+
+
+def _get_approved_lead_counts() -> tuple[dict, dict, dict]:
+    """({тип: за неделю}, {тип: за месяц}, {тип: всего}) по одобренным лидам."""
+    now_ts = time_module.time()
+    if _LEAD_STATS_CACHE["counts"] is not None and now_ts < _LEAD_STATS_CACHE["cache_until"]:
+        return _LEAD_STATS_CACHE["counts"]
+
     now = timezone.now()
     week_ago = now - timedelta(days=7)
     month_ago = now - timedelta(days=30)
 
-    total_leads_week = Lead.objects.filter(
-        status=Lead.Status.APPROVED, created_at__gte=week_ago
-    ).count()
-    total_leads_month = Lead.objects.filter(
-        status=Lead.Status.APPROVED, created_at__gte=month_ago
-    ).count()
-    total_leads_all = Lead.objects.filter(status=Lead.Status.APPROVED).count()
+    # Один проход по одобренным лидам: неделя/месяц/всё время — условными Count
+    # в одном GROUP BY вместо шести отдельных запросов.
+    leads_week, leads_month, leads_all = {}, {}, {}
+    q_by_type = (
+        Lead.objects.filter(status=Lead.Status.APPROVED)
+        .values("lead_type__name")
+        .annotate(
+            week=Count("id", filter=Q(created_at__gte=week_ago)),
+            month=Count("id", filter=Q(created_at__gte=month_ago)),
+            all=Count("id"),
+        )
+        .order_by()
+    )
+    for x in q_by_type:
+        name = x["lead_type__name"] or "Без категории"
+        # Имена групп могут совпасть (NULL → «Без категории») — суммируем
+        leads_all[name] = leads_all.get(name, 0) + x["all"]
+        if x["week"]:
+            leads_week[name] = leads_week.get(name, 0) + x["week"]
+        if x["month"]:
+            leads_month[name] = leads_month.get(name, 0) + x["month"]
+    _LEAD_STATS_CACHE["counts"] = (leads_week, leads_month, leads_all)
+    _LEAD_STATS_CACHE["cache_until"] = now_ts + LEAD_STATS_CACHE_SECONDS
+    return _LEAD_STATS_CACHE["counts"]
 
-    q_week = Lead.objects.filter(
-        status=Lead.Status.APPROVED, created_at__gte=week_ago
-    ).values("lead_type__name").annotate(c=Count("id"))
-    q_month = Lead.objects.filter(
-        status=Lead.Status.APPROVED, created_at__gte=month_ago
-    ).values("lead_type__name").annotate(c=Count("id"))
-    q_all = Lead.objects.filter(status=Lead.Status.APPROVED).values("lead_type__name").annotate(c=Count("id"))
 
-    leads_week = {x["lead_type__name"] or "Без категории": x["c"] for x in q_week}
-    leads_month = {x["lead_type__name"] or "Без категории": x["c"] for x in q_month}
-    leads_all = {x["lead_type__name"] or "Без категории": x["c"] for x in q_all}
+@login_required
+def admin_stats(request: HttpRequest) -> HttpResponse:
+    if not _require_support(request):
+        return HttpResponseForbidden("Недостаточно прав.")
+
+    # Статистика по базам
+    base_stats = _get_base_stats()
+
+    # Статистика по лидам: за неделю, месяц, всё время
+    leads_week, leads_month, leads_all = _get_approved_lead_counts()
+    total_leads_week = sum(leads_week.values())
+    total_leads_month = sum(leads_month.values())
+    total_leads_all = sum(leads_all.values())
 
     # Для админской статистики показываем все типы лидов, включая «Самостоятельные лиды»,
     # чтобы не терять уже существующие данные.
@@ -1350,9 +1398,11 @@ def admin_stats(request: HttpRequest) -> HttpResponse:
         }
         for n in type_names
     ]
-    # Категории, которые есть в лидах, но нет в LeadType (на всякий случай)
-    for name in set(leads_week.keys()) | set(leads_month.keys()) | set(leads_all.keys()):
-        if name not in type_names:
+    # Категории, которые есть в лидах, но нет в LeadType (на всякий случай).
+    # Проверка по множеству, объединение — прямо по view ключей словарей.
+    known_names = set(type_names)
+    for name in leads_week.keys() | leads_month.keys() | leads_all.keys():
+        if name not in known_names:
             lead_type_stats.append({
                 "name": name,
                 "week": leads_week.get(name, 0),
@@ -1418,15 +1468,15 @@ def _allocate_contacts_to_user(target_user, base_type, count: int) -> int:
             .filter(_taken=False)
             .order_by("id")[:count]
         )
-        contacts_to_give = list(free_qs)
-        if not contacts_to_give:
+        ids = list(free_qs.values_list("pk", flat=True))
+        if not ids:
             return 0
+        # Один UPDATE на всю пачку вместо save() на каждый контакт
         now = timezone.now()
-        for c in contacts_to_give:
-            c.assigned_to = target_user
-            c.assigned_at = now
-            c.save(update_fields=["assigned_to", "assigned_at", "updated_at"])
-        return len(contacts_to_give)
+        Contact.objects.filter(pk__in=ids).update(
+            assigned_to=target_user, assigned_at=now, updated_at=now
+        )
+        return len(ids)
 
 
 @login_required
@@ -1564,7 +1614,7 @@ def admin_withdrawal_requests_export(request: HttpRequest) -> HttpResponse:
 
     def _parse_date(s: str):
         try:
-            return _dt.strptime(s, "%Y-%m-%d").date()
+            return date.fromisoformat(s)
         except (ValueError, TypeError):
             return None
 
@@ -1609,9 +1659,13 @@ def admin_withdrawal_requests_export(request: HttpRequest) -> HttpResponse:
         .order_by("processed_at")
     )
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"Выводы {period_label}"
+    # write_only: лист создаётся явно (листа по умолчанию нет), ширины колонок
+    # задаются до первой строки — потом строки пишутся потоком.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=f"Выводы {period_label}")
+    widths = [10, 22, 28, 13, 11, 14, 50, 16, 16, 17, 17, 18]
+    for i, w in enumerate(widths, start=1):
+        ws.column_dimensions[chr(64 + i)].width = w
     ws.append([f"Одобренные выводы {period_title}"])
     ws.append([])
     ws.append([
@@ -1630,7 +1684,8 @@ def admin_withdrawal_requests_export(request: HttpRequest) -> HttpResponse:
     ])
 
     total_amount = 0
-    for req in qs:
+    rows_count = 0
+    for req in qs.iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE):
         is_dozhim = bool(req.payout_details and req.payout_details.startswith("[Дожим]"))
         owner = getattr(req.user, "partner_owner", None)
         owner_str = f"@{owner.username}" if owner else ""
@@ -1652,28 +1707,17 @@ def admin_withdrawal_requests_export(request: HttpRequest) -> HttpResponse:
             approver,
         ])
         total_amount += req.amount
+        rows_count += 1
 
-    if qs:
+    if rows_count:
         ws.append([])
         ws.append(["", "", "", "ИТОГО:", total_amount])
     else:
         ws.append([])
         ws.append(["Нет одобренных выводов за выбранный период."])
 
-    widths = [10, 22, 28, 13, 11, 14, 50, 16, 16, 17, 17, 18]
-    for i, w in enumerate(widths, start=1):
-        ws.column_dimensions[chr(64 + i)].width = w
-
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
     today_str = now_local.strftime("%Y-%m-%d")
-    response["Content-Disposition"] = f'attachment; filename="withdrawals_approved_{period_label}_{today_str}.xlsx"'
-    return response
+    return _make_excel_response(wb, f"withdrawals_approved_{period_label}_{today_str}.xlsx")
 
 
 @login_required
@@ -1924,60 +1968,127 @@ def admin_withdrawal_requests(request: HttpRequest) -> HttpResponse:
 
 # Значения первой строки/заголовка — не считаем контактом (как в боте)
 EXCEL_HEADER_VALUES = frozenset(("value", "значение", "контакт", "данные"))
+# Длиннее самого длинного заголовка — точно не заголовок: casefold() не нужен
+_EXCEL_HEADER_MAX_LEN = max(map(len, EXCEL_HEADER_VALUES))
 
 
-def _excel_contact_value(cell_value) -> str | None:
-    """Возвращает значение контакта из ячейки или None (пусто/заголовок)."""
+def _excel_cell_text(cell_value) -> str:
+    """Текст ячейки без пробелов по краям ("" для пустой)."""
     if cell_value is None:
-        return None
-    value = str(cell_value).strip()
-    if not value:
-        return None
-    if value.lower() in EXCEL_HEADER_VALUES:
-        return None
-    return value
+        return ""
+    return (cell_value if isinstance(cell_value, str) else str(cell_value)).strip()
+
+
+def _is_excel_header(value: str) -> bool:
+    """Значение — заголовок колонки (Value/Значение/...), а не контакт."""
+    return len(value) <= _EXCEL_HEADER_MAX_LEN and value.casefold() in EXCEL_HEADER_VALUES
 
 
 def _excel_row_is_assigned(row: tuple) -> bool:
     """Строка «отработана»: в колонках ID/Username/Date (справа от Value) есть данные."""
     if not row or len(row) < 2:
         return False
-    for i in (1, 2, 3):
-        if i < len(row) and row[i] is not None and str(row[i]).strip():
-            return True
-    return False
+    # Пустые ячейки read_only-режим отдаёт как None; строки проверяем на пробелы
+    return any(
+        v is not None and (not isinstance(v, str) or v.strip())
+        for v in row[1:4]
+    )
+
+
+def _excel_free_values(ws, limit: int | None = None) -> list[str]:
+    """Свободные контакты листа (первый столбец, строки без ID/User/Date), без повторов.
+
+    Повторы внутри файла убираем здесь (dict сохраняет порядок), чтобы не гонять
+    их через нормализацию и запросы к БД; проверка на заголовок (casefold) — один
+    раз на уникальное значение.
+    limit — чтение листа прекращается, как только уникальных значений больше limit
+    (хватает, чтобы отклонить слишком большой файл, не разбирая его до конца)."""
+    unique: dict[str, None] = {}
+    headers: set[str] = set()
+    for row in ws.iter_rows(min_row=2, max_col=4, values_only=True):
+        if _excel_row_is_assigned(row):
+            continue
+        value = _excel_cell_text(row[0] if row else None)
+        # Повтор уже учтённого значения — без повторной проверки на заголовок
+        if not value or value in unique or value in headers:
+            continue
+        if _is_excel_header(value):
+            headers.add(value)
+            continue
+        unique[value] = None
+        if limit is not None and len(unique) > limit:
+            break
+    return list(unique)
 
 
 BULK_CREATE_BATCH_SIZE = 1000
 
+
+def _bulk_add_contacts(
+    base_type: BaseType, values: list[str], normalized: dict[str, str] | None = None
+) -> int:
+    """Добавляет в базу контакты, которых в ней ещё нет. Возвращает кол-во добавленных.
+
+    Вместо COUNT(*) по всей базе до и после вставки — по каждой пачке одним
+    запросом по уникальному индексу (base_type, value) узнаём уже существующие
+    значения и вставляем только новые (разность множеств, без поштучных проверок).
+    normalized — общий кэш value -> normalized_value: при загрузке одних и тех же
+    значений в несколько баз (телефонные) каждое нормализуется один раз."""
+    if normalized is None:
+        normalized = {}
+    # Повторы во входных данных убираем один раз для всего списка (с сохранением порядка),
+    # чтобы пачки не тянули из БД одни и те же значения
+    values = list(dict.fromkeys(values))
+    created = 0
+    for i in range(0, len(values), BULK_CREATE_BATCH_SIZE):
+        chunk = values[i : i + BULK_CREATE_BATCH_SIZE]
+        with transaction.atomic():
+            # Блокируем строку базы: параллельные загрузки в ту же базу идут по очереди,
+            # поэтому проверка существующих и вставка согласованы и счётчик точный
+            BaseType.objects.select_for_update().get(pk=base_type.pk)
+            existing = set(
+                Contact.objects.filter(base_type=base_type, value__in=chunk)
+                .values_list("value", flat=True)
+            )
+            new_values = [v for v in chunk if v not in existing]
+            if not new_values:
+                continue
+            for v in new_values:
+                if v not in normalized:
+                    normalized[v] = normalize_lead_contact(v)
+            # ignore_conflicts — страховка от точечного автодобавления контакта из SearchLink
+            Contact.objects.bulk_create(
+                [Contact(base_type=base_type, value=v, normalized_value=normalized[v])
+                 for v in new_values],
+                ignore_conflicts=True,
+            )
+        created += len(new_values)
+    if created:
+        clear_base_stats_cache()
+    return created
+
 # Телефонные базы: загрузка в одну → автоматическая репликация во все остальные
 PHONE_BASE_SLUGS = ("whatsapp", "max", "viber")
 
 
-def _replicate_to_phone_bases(values: list[str], source_slug: str) -> dict[str, int]:
+def _replicate_to_phone_bases(
+    values: list[str], source_slug: str, normalized: dict[str, str] | None = None
+) -> dict[str, int]:
     """Реплицирует контакты из телефонной базы во все остальные телефонные базы.
-    Возвращает {slug: кол-во созданных} для каждой целевой базы."""
+    Возвращает {slug: кол-во созданных} для каждой целевой базы.
+    normalized — кэш нормализации, уже заполненный при загрузке в исходную базу."""
+    if normalized is None:
+        normalized = {}
     if source_slug not in PHONE_BASE_SLUGS or not values:
         return {}
     result = {}
     for slug in PHONE_BASE_SLUGS:
         if slug == source_slug:
             continue
-        try:
-            bt = BaseType.objects.get(slug=slug)
-        except BaseType.DoesNotExist:
+        bt = get_base_type_by_slug(slug)
+        if bt is None:
             continue
-        count_before = Contact.objects.filter(base_type=bt).count()
-        for i in range(0, len(values), BULK_CREATE_BATCH_SIZE):
-            chunk = values[i : i + BULK_CREATE_BATCH_SIZE]
-            Contact.objects.bulk_create(
-                [Contact(base_type=bt, value=v,
-                         normalized_value=normalize_lead_contact(v))
-                 for v in chunk],
-                ignore_conflicts=True,
-            )
-        count_after = Contact.objects.filter(base_type=bt).count()
-        result[slug] = count_after - count_before
+        result[slug] = _bulk_add_contacts(bt, values, normalized)
     return result
 # Лимит строк на одну загрузку, чтобы не превышать таймаут воркера (gunicorn)
 MAX_UPLOAD_ROWS = 40_000
@@ -2024,7 +2135,7 @@ EXCEL_SHEET_MAP = {
 def _run_bases_import_background(file_path: str, job_id: int) -> None:
     """Выполняет импорт всех листов в фоне. Обновляет BasesImportJob по завершении. Удаляет файл."""
     try:
-        wb = load_workbook(file_path, read_only=True)
+        wb = load_workbook(file_path, read_only=True, data_only=True)
         created, skipped, details = _process_excel_all_sheets(wb, max_rows=None)
         wb.close()
         msg = f"Добавлено контактов: {created}, пропущено (дубликаты): {skipped}.\n\n" + "\n".join(details)
@@ -2050,6 +2161,12 @@ def upload_bases_excel(request: HttpRequest) -> HttpResponse:
     return redirect("bases_excel")
 
 
+# Строки отчёта по листам (общие для всех веток цикла по листам)
+_SHEET_LIMIT_MSG = "Лист «%s» — пропущен (достигнут лимит %s строк)"
+_SHEET_UNKNOWN_MSG = "Лист «%s» — неизвестный тип, пропущен"
+_SHEET_NO_BASE_MSG = "Лист «%s» — база не найдена"
+
+
 def _process_excel_all_sheets(wb, max_rows: int | None = MAX_UPLOAD_ROWS) -> tuple[int, int, list]:
     """Обработка книги Excel: все листы по EXCEL_SHEET_MAP. Свободные контакты (без ID/User/Date).
     max_rows: лимит строк (защита от таймаута при синхронной загрузке); None — без лимита (фоновый импорт)."""
@@ -2060,47 +2177,31 @@ def _process_excel_all_sheets(wb, max_rows: int | None = MAX_UPLOAD_ROWS) -> tup
     limit_reached = False
     for sheet in wb.worksheets:
         if limit_reached:
-            details.append(f"Лист «{sheet.title}» — пропущен (достигнут лимит {max_rows} строк)")
+            details.append(_SHEET_LIMIT_MSG % (sheet.title, max_rows))
             continue
         base_slug = EXCEL_SHEET_MAP.get(sheet.title)
         if not base_slug:
-            details.append(f"Лист «{sheet.title}» — неизвестный тип, пропущен")
+            details.append(_SHEET_UNKNOWN_MSG % sheet.title)
             continue
-        try:
-            base_type = BaseType.objects.get(slug=base_slug)
-        except BaseType.DoesNotExist:
-            details.append(f"Лист «{sheet.title}» — база не найдена")
+        # Тип базы — из кэша процесса, без запроса на каждый лист
+        base_type = get_base_type_by_slug(base_slug)
+        if base_type is None:
+            details.append(_SHEET_NO_BASE_MSG % sheet.title)
             continue
-        free_values = []
-        for row in sheet.iter_rows(min_row=2, max_col=4, values_only=True):
-            value = _excel_contact_value(row[0] if row else None)
-            if not value:
-                continue
-            if _excel_row_is_assigned(row):
-                continue
-            free_values.append(value)
+        free_values = _excel_free_values(sheet)
         if max_rows is not None:
             remaining = max_rows - total_rows_processed
             if remaining <= 0:
                 limit_reached = True
-                details.append(f"Лист «{sheet.title}» — пропущен (достигнут лимит {max_rows} строк)")
+                details.append(_SHEET_LIMIT_MSG % (sheet.title, max_rows))
                 continue
             to_process = free_values[:remaining]
             skipped_by_limit = len(free_values) - len(to_process)
         else:
             to_process = free_values
             skipped_by_limit = 0
-        count_before = Contact.objects.filter(base_type=base_type).count()
-        for i in range(0, len(to_process), BULK_CREATE_BATCH_SIZE):
-            chunk = to_process[i : i + BULK_CREATE_BATCH_SIZE]
-            Contact.objects.bulk_create(
-                [Contact(base_type=base_type, value=v,
-                         normalized_value=normalize_lead_contact(v))
-                 for v in chunk],
-                ignore_conflicts=True,
-            )
-        count_after = Contact.objects.filter(base_type=base_type).count()
-        sheet_created = count_after - count_before
+        normalized: dict[str, str] = {}
+        sheet_created = _bulk_add_contacts(base_type, to_process, normalized)
         sheet_skipped = len(to_process) - sheet_created
         total_created += sheet_created
         total_skipped += sheet_skipped
@@ -2116,7 +2217,7 @@ def _process_excel_all_sheets(wb, max_rows: int | None = MAX_UPLOAD_ROWS) -> tup
                 f"«{base_type.name}» — свободных строк {len(free_values)}, добавлено {sheet_created}, дубликатов {sheet_skipped}"
             )
         # Репликация телефонных номеров во все телефонные базы
-        replicated = _replicate_to_phone_bases(to_process, base_slug)
+        replicated = _replicate_to_phone_bases(to_process, base_slug, normalized)
         for rslug, rcount in replicated.items():
             if rcount > 0:
                 total_created += rcount
@@ -2126,34 +2227,22 @@ def _process_excel_all_sheets(wb, max_rows: int | None = MAX_UPLOAD_ROWS) -> tup
     return total_created, total_skipped, details
 
 
-def _process_excel_single_sheet(wb, base_type: BaseType) -> tuple[int, int]:
-    """Обработка книги Excel: первый лист, первый столбец. Только свободные контакты (без ID/User/Date)."""
-    ws = wb.active
-    free_values = []
-    for row in ws.iter_rows(min_row=2, max_col=4, values_only=True):
-        value = _excel_contact_value(row[0] if row else None)
-        if not value:
-            continue
-        if _excel_row_is_assigned(row):
-            continue
-        free_values.append(value)
+def _excel_single_sheet_values(wb) -> list[str]:
+    """Свободные контакты первого листа книги (с проверкой лимита MAX_UPLOAD_ROWS)."""
+    free_values = _excel_free_values(wb.active, limit=MAX_UPLOAD_ROWS)
     if len(free_values) > MAX_UPLOAD_ROWS:
         raise ValueError(
-            f"В файле слишком много строк: {len(free_values)}. "
+            f"В файле больше {MAX_UPLOAD_ROWS} строк. "
             f"Максимум за одну загрузку: {MAX_UPLOAD_ROWS}. Разбейте файл на части или загрузите «все листы»."
         )
-    count_before = Contact.objects.filter(base_type=base_type).count()
-    for i in range(0, len(free_values), BULK_CREATE_BATCH_SIZE):
-        chunk = free_values[i : i + BULK_CREATE_BATCH_SIZE]
-        Contact.objects.bulk_create(
-            [Contact(base_type=base_type, value=v,
-                     normalized_value=normalize_lead_contact(v))
-             for v in chunk],
-            ignore_conflicts=True,
-        )
-    count_after = Contact.objects.filter(base_type=base_type).count()
-    created = count_after - count_before
-    return created, len(free_values) - (count_after - count_before)
+    return free_values
+
+
+def _process_excel_single_sheet(wb, base_type: BaseType) -> tuple[int, int]:
+    """Обработка книги Excel: первый лист, первый столбец. Только свободные контакты (без ID/User/Date)."""
+    free_values = _excel_single_sheet_values(wb)
+    created = _bulk_add_contacts(base_type, free_values)
+    return created, len(free_values) - created
 
 
 @login_required
@@ -2206,17 +2295,24 @@ def bases_excel(request: HttpRequest) -> HttpResponse:
                 if not (file and file.name and file.name.lower().endswith(".xlsx")):
                     messages.error(request, "Нужен файл в формате .xlsx")
                 elif base_type == BaseCategoryUploadForm.PHONE_BASES_VALUE:
-                    # Загрузка номеров сразу во все телефонные базы
+                    # Загрузка номеров сразу во все телефонные базы: файл разбираем
+                    # один раз, значения нормализуем один раз на все базы
                     try:
-                        wb = load_workbook(file, read_only=True)
+                        wb = load_workbook(file, read_only=True, data_only=True)
+                        try:
+                            free_values = _excel_single_sheet_values(wb)
+                        finally:
+                            wb.close()
+                        normalized: dict[str, str] = {}
                         total_created = 0
                         total_skipped = 0
                         for slug in PHONE_BASE_SLUGS:
-                            bt = BaseType.objects.get(slug=slug)
-                            created, skipped = _process_excel_single_sheet(wb, bt)
+                            bt = get_base_type_by_slug(slug)
+                            if bt is None:
+                                continue
+                            created = _bulk_add_contacts(bt, free_values, normalized)
                             total_created += created
-                            total_skipped += skipped
-                        wb.close()
+                            total_skipped += len(free_values) - created
                         messages.success(
                             request,
                             f"Номера загружены в WhatsApp, Max, Viber: добавлено {total_created}, дубликатов {total_skipped}.",
@@ -2226,9 +2322,11 @@ def bases_excel(request: HttpRequest) -> HttpResponse:
                         messages.error(request, f"Ошибка при обработке файла: {e}")
                 else:
                     try:
-                        wb = load_workbook(file, read_only=True)
-                        created, skipped = _process_excel_single_sheet(wb, base_type)
-                        wb.close()
+                        wb = load_workbook(file, read_only=True, data_only=True)
+                        try:
+                            created, skipped = _process_excel_single_sheet(wb, base_type)
+                        finally:
+                            wb.close()
                         messages.success(
                             request,
                             f"База «{base_type.name}»: добавлено {created} контактов, пропущено (дубликаты) {skipped}.",
@@ -2252,18 +2350,35 @@ def bases_excel(request: HttpRequest) -> HttpResponse:
     )
 
 
-def _make_bases_excel_response(wb, filename: str) -> HttpResponse:
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+def _make_excel_response(wb, filename: str) -> HttpResponse:
+    # Пишем книгу прямо в ответ: без промежуточного BytesIO и копии байтов через getvalue()
     response = HttpResponse(
-        buffer.getvalue(),
         content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    wb.save(response)
     return response
 
 
+# Строк за один проход курсора при выгрузке (не грузим всю базу в память)
+EXPORT_ITERATOR_CHUNK_SIZE = 2000
+
+
+def _append_base_contacts_sheet(wb, base_type: BaseType) -> None:
+    """Лист с контактами базы: Value / User / Assigned at. Строки — потоком из БД
+    (values_list + iterator), без создания моделей Contact/User на каждую строку."""
+    ws = wb.create_sheet(title=base_type.name[:31])
+    ws.append(["Value", "User", "Assigned at"])
+    rows = (
+        Contact.objects.filter(base_type=base_type)
+        .order_by("id")
+        .values_list("value", "assigned_to__username", "assigned_at")
+        .iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE)
+    )
+    for value, username, assigned_at in rows:
+        ws.append([value, username or "", assigned_at.isoformat() if assigned_at else ""])
+
+
 @login_required
 def download_bases_excel(request: HttpRequest) -> HttpResponse:
     """Выгрузка всех баз контактов в один Excel (по листам)."""
@@ -2271,30 +2386,15 @@ def download_bases_excel(request: HttpRequest) -> HttpResponse:
     if not _require_support_or_partner(request):
         return HttpResponseForbidden("Недостаточно прав.")
 
-    wb = Workbook()
-    first_sheet = True
-
+    # write_only: строки сразу сериализуются, книга не держит все ячейки в памяти.
+    # В таком режиме нет листа по умолчанию — каждый лист создаётся create_sheet.
+    wb = Workbook(write_only=True)
     for base in BaseType.objects.all().order_by("order"):
-        contacts = Contact.objects.filter(base_type=base).select_related("assigned_to").order_by("id")
+        _append_base_contacts_sheet(wb, base)
+    if not wb.worksheets:
+        wb.create_sheet(title="Bases")
 
-        if first_sheet:
-            ws = wb.active
-            ws.title = base.name[:31]
-            first_sheet = False
-        else:
-            ws = wb.create_sheet(title=base.name[:31])
-
-        ws.append(["Value", "User", "Assigned at"])
-        for c in contacts:
-            ws.append(
-                [
-                    c.value,
-                    c.assigned_to.username if c.assigned_to else "",
-                    c.assigned_at.isoformat() if c.assigned_at else "",
-                ]
-            )
-
-    return _make_bases_excel_response(wb, "bases.xlsx")
+    return _make_excel_response(wb, "bases.xlsx")
 
 
 @login_required
@@ -2305,35 +2405,17 @@ def download_bases_excel_category(request: HttpRequest, base_type_id: int) -> Ht
         return HttpResponseForbidden("Недостаточно прав.")
 
     base_type = get_object_or_404(BaseType, pk=base_type_id)
-    contacts = Contact.objects.filter(base_type=base_type).select_related("assigned_to").order_by("id")
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = base_type.name[:31]
-    ws.append(["Value", "User", "Assigned at"])
-    for c in contacts:
-        ws.append(
-            [
-                c.value,
-                c.assigned_to.username if c.assigned_to else "",
-                c.assigned_at.isoformat() if c.assigned_at else "",
-            ]
-        )
+    wb = Workbook(write_only=True)
+    _append_base_contacts_sheet(wb, base_type)
 
     safe_name = base_type.slug or "base"
-    return _make_bases_excel_response(wb, f"bases_{safe_name}.xlsx")
+    return _make_excel_response(wb, f"bases_{safe_name}.xlsx")
 
 
-@login_required
-def download_leads_excel(request: HttpRequest) -> HttpResponse:
-    """Выгрузка всех лидов в один Excel."""
-
-    if not _require_support_or_partner(request):
-        return HttpResponseForbidden("Недостаточно прав.")
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Лиды"
+def _build_leads_workbook():
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Лиды")
 
     ws.append(
         [
@@ -2348,36 +2430,40 @@ def download_leads_excel(request: HttpRequest) -> HttpResponse:
         ]
     )
 
-    leads = (
-        Lead.objects.select_related("user", "lead_type", "base_type")
-        .all()
-        .order_by("-created_at")
+    rows = (
+        Lead.objects.order_by("-created_at")
+        .values_list(
+            "id", "user__username", "lead_type__name", "base_type__name",
+            "raw_contact", "source", "comment", "created_at",
+        )
+        .iterator(chunk_size=EXPORT_ITERATOR_CHUNK_SIZE)
     )
 
-    for lead in leads:
+    for lead_id, username, lead_type_name, base_type_name, raw_contact, source, comment, created_at in rows:
         ws.append(
             [
-                lead.id,
-                lead.user.username,
-                lead.lead_type.name if lead.lead_type else "",
-                lead.base_type.name if lead.base_type else "",
-                lead.raw_contact,
-                lead.source,
-                lead.comment,
-                lead.created_at.isoformat(),
+                lead_id,
+                username,
+                lead_type_name or "",
+                base_type_name or "",
+                raw_contact,
+                source,
+                comment,
+                created_at.isoformat(),
             ]
         )
 
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+    return wb
 
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = 'attachment; filename="leads.xlsx"'
-    return response
+
+@login_required
+def download_leads_excel(request: HttpRequest) -> HttpResponse:
+    """Выгрузка всех лидов в один Excel."""
+
+    if not _require_support_or_partner(request):
+        return HttpResponseForbidden("Недостаточно прав.")
+
+    return _make_excel_response(_build_leads_workbook(), "leads.xlsx")
 
 
 @login_required
@@ -2756,7 +2842,7 @@ def standalone_admin_worker_withdrawal_requests(request: HttpRequest) -> HttpRes
                         wreq.status = "approved"
                         wreq.processed_at = now
                         wreq.processed_by = request.user
-                        wreq.save()
+                        wreq.save(update_fields=["status", "processed_at", "processed_by"])
                         messages.success(request, f"Вывод @{wreq.worker.username} на {wreq.amount} руб. одобрен.")
                     else:
                         # Лочим воркера (не stale-инстанс) + логируем возврат.
@@ -2768,7 +2854,7 @@ def standalone_admin_worker_withdrawal_requests(request: HttpRequest) -> HttpRes
                         wreq.status = "rejected"
                         wreq.processed_at = now
                         wreq.processed_by = request.user
-                        wreq.save()
+                        wreq.save(update_fields=["status", "processed_at", "processed_by"])
                         messages.info(request, f"Заявка @{wreq.worker.username} отклонена. Баланс восстановлен.")
         return redirect("standalone_admin_worker_withdrawal_requests")
 
@@ -3811,10 +3897,10 @@ def admin_calendar(request: HttpRequest) -> HttpResponse:
         with connections["windowgram"].cursor() as cur:
             cur.execute(sql, [range_start, range_end])
             cols = [c[0] for c in cur.description]
-            for row in cur.fetchall():
+            for row in cur:
                 ev = dict(zip(cols, row))
                 name = (ev.get("user_name") or "").strip()
-                is_status = any(name.startswith(p) for p in NON_BOOKING_PREFIXES)
+                is_status = name.startswith(NON_BOOKING_PREFIXES)
                 if not show_status_events and is_status:
                     continue
                 ev["platform"] = "vk" if ev.get("vk_peer_id") else "telegram"
@@ -4160,69 +4246,39 @@ def api_users_with_stats(request: HttpRequest) -> HttpResponse:
     if limit:
         users_qs = users_qs[:limit]
 
-    user_ids = list(users_qs.values_list("id", flat=True))
+    users = list(users_qs)
+    user_ids = [u.id for u in users]
     if not user_ids:
         return JsonResponse({"ok": True, "total": total, "count": 0, "users": []})
 
-    # Bulk-агрегаты — один запрос на каждую таблицу/период
-    def _bulk_counts(qs, user_field="user_id"):
-        return dict(
-            qs.values(user_field).annotate(c=Count("id")).values_list(user_field, "c")
-        )
-
-    lead_total = _bulk_counts(
-        Lead.objects.filter(user_id__in=user_ids, status="approved")
-    )
-    lead_today = _bulk_counts(
-        Lead.objects.filter(
-            user_id__in=user_ids, status="approved",
-            created_at__gte=today_start, created_at__lt=today_end,
-        )
-    )
-    lead_week = _bulk_counts(
-        Lead.objects.filter(
-            user_id__in=user_ids, status="approved",
-            created_at__gte=week_start,
-        )
-    )
-
-    sr_total = _bulk_counts(
-        SearchReport.objects.filter(user_id__in=user_ids, status="approved")
-    )
-    sr_today = _bulk_counts(
-        SearchReport.objects.filter(
-            user_id__in=user_ids, status="approved",
-            created_at__gte=today_start, created_at__lt=today_end,
-        )
-    )
-    sr_week = _bulk_counts(
-        SearchReport.objects.filter(
-            user_id__in=user_ids, status="approved",
-            created_at__gte=week_start,
-        )
-    )
-
-    gr_total = gr_today = gr_week = {}
-    if GroupReport is not None:
-        gr_total = _bulk_counts(
-            GroupReport.objects.filter(user_id__in=user_ids, status="approved")
-        )
-        gr_today = _bulk_counts(
-            GroupReport.objects.filter(
-                user_id__in=user_ids, status="approved",
-                created_at__gte=today_start, created_at__lt=today_end,
-            )
-        )
-        gr_week = _bulk_counts(
-            GroupReport.objects.filter(
-                user_id__in=user_ids, status="approved",
-                created_at__gte=week_start,
+    # Bulk-агрегаты — один GROUP BY user_id на таблицу: всего/сегодня/неделя
+    # условными Count за один проход по approved-строкам этих пользователей
+    zero = (0, 0, 0)
+
+    def _bulk_counts(model) -> dict:
+        rows = (
+            model.objects.filter(user_id__in=user_ids, status="approved")
+            .values("user_id")
+            .annotate(
+                total=Count("id"),
+                today=Count("id", filter=Q(created_at__gte=today_start, created_at__lt=today_end)),
+                week=Count("id", filter=Q(created_at__gte=week_start)),
             )
+            .values_list("user_id", "total", "today", "week")
+            .order_by()
         )
+        return {uid: (total, today, week) for uid, total, today, week in rows}
+
+    lead_c = _bulk_counts(Lead)
+    sr_c = _bulk_counts(SearchReport)
+    gr_c = _bulk_counts(GroupReport) if GroupReport is not None else {}
 
     data = []
-    for u in users_qs:
+    for u in users:
         days_on_platform = (today_d - u.date_joined.date()).days if u.date_joined else 0
+        l_tot, l_day, l_week = lead_c.get(u.id, zero)
+        s_tot, s_day, s_week = sr_c.get(u.id, zero)
+        g_tot, g_day, g_week = gr_c.get(u.id, zero)
         data.append({
             "id": u.id,
             "username": u.username,
@@ -4230,9 +4286,9 @@ def api_users_with_stats(request: HttpRequest) -> HttpResponse:
             "status": u.status,
             "date_joined": u.date_joined.isoformat() if u.date_joined else None,
             "days_on_platform": max(0, days_on_platform),
-            "leads_total": (lead_total.get(u.id, 0) + sr_total.get(u.id, 0) + gr_total.get(u.id, 0)),
-            "leads_today": (lead_today.get(u.id, 0) + sr_today.get(u.id, 0) + gr_today.get(u.id, 0)),
-            "leads_week":  (lead_week.get(u.id, 0)  + sr_week.get(u.id, 0)  + gr_week.get(u.id, 0)),
+            "leads_total": l_tot + s_tot + g_tot,
+            "leads_today": l_day + s_day + g_day,
+            "leads_week": l_week + s_week + g_week,
         })
 
     return JsonResponse({"ok": True, "total": total, "count": len(data), "users": data})